@@ -0,0 +1,362 @@
+"""Benchmarks of the data loading and analytics hot paths.
+
+Run from the repository root:
+
+    poetry run python benchmarks/benchmark.py --output results.json
+    poetry run python benchmarks/benchmark.py --save-baseline
+    poetry run python benchmarks/benchmark.py --baseline benchmarks/baseline.json
+
+Every case is run in a new Python process, `--repeat` times after an
+untimed setup. The wall time (min and median), the increase of the peak RSS
+during a run (over the RSS after its setup) and the peak of memory allocated
+during a separate traced run are reported.
+When a baseline is given, the run fails for cases slower than the baseline by
+more than `--tolerance`, using more memory by more than `--memory-tolerance`,
+or missing from the baseline, and when the baseline was run with(out) the
+price store while this run is not.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src" / "lessons"))
+# The lessons read data/ relative to the working directory.
+os.chdir(ROOT)
+
+# Render plots (drawn by the lesson_8 fit routines) off screen.
+import matplotlib  # noqa: E402
+
+matplotlib.use("Agg")
+
+import matplotlib.pyplot as plt  # noqa: E402
+import numpy as np  # noqa: E402
+
+from lesson_2 import clear_cache, get_compact_prices, get_stock_prices  # noqa: E402
+from lesson_4 import (  # noqa: E402
+    compute_daily_returns,
+    get_bollinger_bands,
+    get_rolling_mean,
+    get_rolling_std,
+)
+from lesson_5 import fill_missing_values  # noqa: E402
+from lesson_7 import compute_portfolio_value  # noqa: E402
+from lesson_8 import error_line, error_poly, fit_line, fit_poly  # noqa: E402
+from price_store import open_store  # noqa: E402
+
+DEFAULT_BASELINE = Path(__file__).parent / "baseline.json"
+
+SHORT_RANGE = ("2012-01-01", "2012-01-31")
+LONG_RANGE = ("2002-01-01", "2011-12-31")
+
+# Memory increases smaller than this never fail a comparison (small cases
+# allocate a few KiB, whose variations are noise).
+MEMORY_SLACK_BYTES = 2**20
+
+
+class Case(NamedTuple):
+    name: str
+    # Returns the arguments of `run`, it is not timed.
+    setup: Callable[[], Tuple]
+    run: Callable[..., Any]
+
+
+@lru_cache(maxsize=1)
+def all_symbols() -> List[str]:
+    """Returns all symbols in data/ except SPY (which is always loaded)."""
+    return sorted(
+        path.stem for path in Path("data").glob("*.csv") if path.stem != "SPY"
+    )
+
+
+@lru_cache(maxsize=None)
+def universe_prices(start_date: str, end_date: str):
+    return get_stock_prices(all_symbols(), start_date, end_date)
+
+
+def uncached(*args) -> Tuple:
+    """Empties the symbol dataframe cache, so that the files are read again."""
+    clear_cache()
+    return args
+
+
+def noisy_data(x: np.ndarray, coeffs: List[float], sigma: float) -> np.ndarray:
+    rng = np.random.default_rng(0)
+    y = np.polyval(coeffs, x) + rng.normal(0, sigma, size=x.shape)
+    return np.asarray([x, y]).T
+
+
+def quietly(fn: Callable, *args) -> Any:
+    """Calls the function without its printed output and drawn figures."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = fn(*args)
+    plt.close("all")
+    return result
+
+
+def build_cases() -> List[Case]:
+    cases = []
+    symbol_counts = {"1": 1, "10": 10, "100": 100, "all": len(all_symbols())}
+    ranges = {"short": SHORT_RANGE, "long": LONG_RANGE}
+    for count_name, count in symbol_counts.items():
+        for range_name, (start_date, end_date) in ranges.items():
+            cases.append(
+                Case(
+                    f"get_stock_prices[{count_name}-{range_name}]",
+                    lambda count=count, s=start_date, e=end_date: uncached(
+                        all_symbols()[:count], s, e
+                    ),
+                    get_stock_prices,
+                )
+            )
+
+    cases += [
+        Case(
+            "get_compact_prices[all-long]",
+            lambda: uncached(all_symbols(), *LONG_RANGE),
+            get_compact_prices,
+        ),
+        Case(
+            "fill_missing_values[all-long]",
+            # The dataframe is filled in place, so each run gets a copy.
+            lambda: (universe_prices(*LONG_RANGE).copy(),),
+            fill_missing_values,
+        ),
+        Case(
+            "compute_daily_returns[all-long]",
+            lambda: (universe_prices(*LONG_RANGE),),
+            compute_daily_returns,
+        ),
+        Case(
+            "get_rolling_mean[all-long]",
+            lambda: (universe_prices(*LONG_RANGE), 20),
+            get_rolling_mean,
+        ),
+        Case(
+            "get_rolling_std[all-long]",
+            lambda: (universe_prices(*LONG_RANGE), 20),
+            get_rolling_std,
+        ),
+        Case(
+            "get_bollinger_bands[all-long]",
+            lambda: (
+                get_rolling_mean(universe_prices(*LONG_RANGE), 20),
+                get_rolling_std(universe_prices(*LONG_RANGE), 20),
+            ),
+            get_bollinger_bands,
+        ),
+        Case(
+            "compute_portfolio_value[4-long]",
+            lambda: (
+                1_000_000,
+                ["SPY", "XOM", "GOOG", "GLD"],
+                [0.4, 0.4, 0.1, 0.1],
+                *LONG_RANGE,
+            ),
+            compute_portfolio_value,
+        ),
+        Case(
+            "fit_line",
+            lambda: (
+                fit_line,
+                noisy_data(np.linspace(0, 10, 20), [4, 2], 3.0),
+                error_line,
+            ),
+            quietly,
+        ),
+        Case(
+            "fit_poly",
+            lambda: (
+                fit_poly,
+                noisy_data(np.linspace(-100, 100, 50), [1.5, 10, 5, 60, 50], 5e6),
+                error_poly,
+                4,
+            ),
+            quietly,
+        ),
+    ]
+    return cases
+
+
+def proc_status_bytes(field: str) -> Optional[int]:
+    """Returns a memory size (e.g. "VmRSS") of /proc/self/status, None without /proc."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    # In kB
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def peak_rss_bytes() -> int:
+    """Returns the peak resident set size of the process (since it was reset)."""
+    peak = proc_status_bytes("VmHWM")
+    if peak is not None:
+        return peak
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def reset_peak_rss() -> int:
+    """Resets the peak RSS to the current RSS and returns it.
+
+    NOTE: Only Linux can reset it. Elsewhere the peak so far is returned, so
+    the memory a run uses below the peak of the imports and setup is missed.
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        return peak_rss_bytes()
+    return proc_status_bytes("VmRSS")
+
+
+def run_case(case: Case, repeat: int) -> Dict[str, float]:
+    times = []
+    rss_increases = []
+    for _ in range(repeat):
+        args = case.setup()
+        rss = reset_peak_rss()
+        start = time.perf_counter()
+        case.run(*args)
+        times.append(time.perf_counter() - start)
+        rss_increases.append(peak_rss_bytes() - rss)
+
+    # Tracing slows the code down, so allocations are measured in a separate run.
+    args = case.setup()
+    tracemalloc.start()
+    case.run(*args)
+    _, allocated_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "min_seconds": min(times),
+        "median_seconds": statistics.median(times),
+        # The first run can hold one-off allocations (e.g. of lazy imports).
+        "rss_increase_bytes": min(rss_increases),
+        "allocated_peak_bytes": allocated_peak,
+    }
+
+
+def run_case_in_process(name: str, repeat: int) -> Dict[str, float]:
+    """Runs the case in a new process, so that it does not share memory with other cases."""
+    output = subprocess.run(
+        [sys.executable, __file__, "--case", name, "--repeat", str(repeat)],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def compare(
+    report: Dict[str, Any],
+    baseline: Dict[str, Any],
+    tolerance: float,
+    memory_tolerance: float,
+) -> List[str]:
+    """Returns the regressions of the report against the baseline report."""
+    regressions = []
+    if report["price_store"] != baseline.get("price_store"):
+        regressions.append(
+            f"price store used: {report['price_store']},"
+            f" in the baseline: {baseline.get('price_store')}"
+        )
+    for name, result in report["cases"].items():
+        if name not in baseline["cases"]:
+            regressions.append(f"{name}: missing from the baseline")
+            continue
+        expected = baseline["cases"][name]
+        limit = expected["min_seconds"] * (1 + tolerance)
+        if result["min_seconds"] > limit:
+            regressions.append(
+                f"{name}: {result['min_seconds']:.4f}s > "
+                f"{expected['min_seconds']:.4f}s + {tolerance:.0%}"
+            )
+        for key in ["rss_increase_bytes", "allocated_peak_bytes"]:
+            limit = max(
+                expected[key] * (1 + memory_tolerance),
+                expected[key] + MEMORY_SLACK_BYTES,
+            )
+            if result[key] > limit:
+                regressions.append(
+                    f"{name}: {key} {result[key] / 2**20:.1f} MiB > "
+                    f"{expected[key] / 2**20:.1f} MiB + {memory_tolerance:.0%}"
+                )
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--filter", default="", help="run only cases containing this")
+    parser.add_argument("--output", type=Path, help="save the results as JSON")
+    parser.add_argument("--baseline", type=Path, help="compare against this JSON")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--memory-tolerance", type=float, default=0.25)
+    parser.add_argument("--case", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case is not None:
+        # Run by `run_case_in_process`: print the result of this case only.
+        (case,) = [case for case in build_cases() if case.name == args.case]
+        print(json.dumps(run_case(case, args.repeat)))
+        return 0
+
+    results = {}
+    for case in build_cases():
+        if args.filter not in case.name:
+            continue
+        result = run_case_in_process(case.name, args.repeat)
+        results[case.name] = result
+        print(
+            f"{case.name:40} {result['min_seconds']:9.4f}s"
+            f" (median {result['median_seconds']:.4f}s)"
+            f" rss +{result['rss_increase_bytes'] / 2**20:7.1f} MiB"
+            f" allocated {result['allocated_peak_bytes'] / 2**20:7.1f} MiB"
+        )
+
+    report = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "price_store": open_store() is not None,
+        "cases": results,
+    }
+    for path in [args.output, DEFAULT_BASELINE if args.save_baseline else None]:
+        if path is not None:
+            with open(path, "w") as f:
+                json.dump(report, f, indent=2)
+            print(f"Saved results to {path}")
+
+    if args.baseline is not None:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance, args.memory_tolerance)
+        if regressions:
+            print("REGRESSIONS:")
+            for regression in regressions:
+                print("  " + regression)
+            return 1
+        print(f"No regressions against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+"""Benchmark of the time to import the numeric core in a new interpreter.
+
+Run from the repository root:
+
+    poetry run python benchmarks/import_time.py
+
+Each import is timed `--repeat` times in a fresh Python process. `core` is
+compared to `core` plus `matplotlib.pyplot`, which is what importing the
+lessons cost when they imported pyplot at import time. The run fails when
+importing `core` loads matplotlib.
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import List, Tuple
+
+ROOT = Path(__file__).resolve().parents[1]
+LESSONS_DIR = ROOT / "src" / "lessons"
+
+# Prints the import time and whether matplotlib has been loaded.
+SCRIPT = """
+import sys, time
+start = time.perf_counter()
+{imports}
+print(time.perf_counter() - start, "matplotlib" in sys.modules)
+"""
+
+
+def time_import(imports: str, repeat: int) -> Tuple[List[float], bool]:
+    """Returns the times of the imports (each in a new process) and if they load matplotlib."""
+    times = []
+    loads_matplotlib = False
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", SCRIPT.format(imports=imports)],
+            cwd=LESSONS_DIR,
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout.split()
+        times.append(float(output[0]))
+        loads_matplotlib = output[1] == "True"
+    return times, loads_matplotlib
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    cases = {
+        "core": "import core",
+        "core + matplotlib.pyplot": "import core\nimport matplotlib.pyplot",
+    }
+    results = {}
+    for name, imports in cases.items():
+        times, loads_matplotlib = time_import(imports, args.repeat)
+        results[name] = min(times)
+        print(
+            f"{name:28} {min(times):7.3f}s (median {statistics.median(times):.3f}s)"
+            f" matplotlib loaded: {loads_matplotlib}"
+        )
+        if name == "core" and loads_matplotlib:
+            print("FAIL: importing core loads matplotlib")
+            return 1
+
+    saved = results["core + matplotlib.pyplot"] - results["core"]
+    print(f"Saved at startup by not importing matplotlib: {saved:.3f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,175 @@
+import numbers
+from typing import Callable, NamedTuple, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from lesson_7 import (
+    compute_portfolio_average_daily_return,
+    compute_portfolio_cumulative_return,
+    compute_portfolio_daily_returns,
+    compute_portfolio_risk,
+    compute_sharpe_ratio,
+)
+
+# Most fixed-point iterations to size the trades net of their costs.
+COST_ITERATIONS = 50
+
+# Target allocations given the day (position) and the prices up to that day.
+Strategy = Callable[[int, np.ndarray], np.ndarray]
+
+
+class BacktestResult(NamedTuple):
+    """Daily values and metrics (see lesson_7) of a backtested portfolio."""
+
+    portfolio_value: pd.Series
+    # Transaction costs paid on every day (0 when not rebalancing).
+    costs: pd.Series
+    cumulative_return: float
+    average_daily_return: float
+    risk: float
+    sharpe_ratio: float
+
+
+def rebalance_days(
+    dates: pd.DatetimeIndex, rebalance: Union[None, int, str]
+) -> np.ndarray:
+    """Returns the positions of the days when the portfolio is rebalanced.
+
+    The first day always is. Then every `rebalance` days when it is a number,
+    or the first day of every period when it is a frequency (e.g. "W", "M", "Q").
+    Never when it is None (buy and hold). Raises a ValueError for a number
+    below 1 (or a bool).
+    """
+    if rebalance is None:
+        return np.array([0])
+    if isinstance(rebalance, bool):
+        raise ValueError("rebalance must be a number of days, a frequency or None")
+    if isinstance(rebalance, numbers.Integral):
+        if rebalance < 1:
+            raise ValueError("rebalance must be at least 1 day")
+        return np.arange(0, len(dates), rebalance)
+    periods = dates.to_period(rebalance)
+    return np.flatnonzero(np.r_[True, periods[1:] != periods[:-1]])
+
+
+def backtest(
+    prices: pd.DataFrame,
+    allocations: Union[Sequence[float], Strategy],
+    budget: float = 1.0,
+    rebalance: Union[None, int, str] = "M",
+    cost_rate: float = 0.0,
+    risk_free_rate: float = 0.01,
+) -> BacktestResult:
+    """Walks forward through the prices, rebalancing the portfolio to the allocations.
+
+    `allocations` are fixed target allocations, or a strategy returning them
+    on every rebalance day from the prices up to that day (a view of the
+    forward filled prices, so that nothing is copied). The money not allocated is held as cash.
+
+    Between rebalances the holdings (number of shares) do not change, so each
+    day only costs a dot product of the holdings with the day's prices.
+    Rebalancing trades to the target allocations at the day's prices and pays
+    `cost_rate` (e.g. 0.001 for 10 basis points) of the traded value. The
+    trades are sized on the value net of their costs, so a fully invested
+    portfolio never borrows cash to pay them.
+
+    Missing prices are filled forward (a held symbol keeps its last price).
+    Symbols without a price yet are not bought, their allocation stays cash.
+
+    With fixed allocations, no rebalancing, no costs and no missing prices,
+    the portfolio value is the one of `lesson_7.compute_portfolio_value`.
+    With missing prices they differ: lesson_7 adds up only the prices of the
+    day, while here the unbought allocations are cash and held symbols keep
+    their last price.
+    """
+    filled = prices.ffill().to_numpy(dtype=np.float64)
+    priced = ~np.isnan(filled)
+    values = np.nan_to_num(filled)
+    if callable(allocations):
+        strategy = allocations
+    else:
+        fixed = np.asarray(allocations, dtype=np.float64)
+
+        def strategy(day: int, history: np.ndarray) -> np.ndarray:
+            return fixed
+
+    portfolio_value = np.empty(len(values))
+    costs = np.zeros(len(values))
+    holdings = np.zeros(values.shape[1])
+    cash = budget
+    days = rebalance_days(prices.index, rebalance)
+    for start, end in zip(days, np.r_[days[1:], len(values)]):
+        day_prices = values[start]
+        value = cash + holdings @ day_prices
+        targets = np.where(priced[start], strategy(start, filled[: start + 1]), 0)
+        targets_value = value * targets
+        held_value = holdings * day_prices
+        # The costs are paid out of the value they are sized on: solve
+        # cost = cost_rate * |(value - cost) * targets - held| by fixed-point
+        # iterations (each one multiplies the error by at most cost_rate
+        # times the sum of the allocations).
+        cost = 0.0
+        for _ in range(COST_ITERATIONS):
+            last_cost = cost
+            cost = cost_rate * np.abs(targets_value - cost * targets - held_value).sum()
+            if abs(cost - last_cost) <= 1e-12 * abs(value):
+                break
+        with np.errstate(divide="ignore", invalid="ignore"):
+            new_holdings = np.where(
+                priced[start], (value - cost) * targets / day_prices, 0
+            )
+        costs[start] = cost
+        cash = value - new_holdings @ day_prices - cost
+        holdings = new_holdings
+        # Until the next rebalance, the value only moves with the prices.
+        portfolio_value[start:end] = values[start:end] @ holdings + cash
+
+    portfolio_value = pd.Series(portfolio_value, index=prices.index)
+    daily_returns = compute_portfolio_daily_returns(portfolio_value)
+    return BacktestResult(
+        portfolio_value=portfolio_value,
+        costs=pd.Series(costs, index=prices.index),
+        cumulative_return=compute_portfolio_cumulative_return(portfolio_value),
+        average_daily_return=compute_portfolio_average_daily_return(daily_returns),
+        risk=compute_portfolio_risk(daily_returns),
+        sharpe_ratio=compute_sharpe_ratio(daily_returns, risk_free_rate),
+    )
+
+
+if __name__ == "__main__":
+    from lesson_2 import get_stock_prices
+    from portfolio_optimizer import compute_return_moments, optimize_allocations
+
+    symbols = ["SPY", "XOM", "GOOG", "GLD", "IBM", "AAPL"]
+    prices = get_stock_prices(symbols, "2005-01-01", "2011-12-31")
+
+    def print_result(result: BacktestResult) -> None:
+        print("Cumulative return:", result.cumulative_return)
+        print("Sharpe ratio:", result.sharpe_ratio)
+        print("Costs:", result.costs.sum())
+
+    print("Equal allocations, rebalanced every month (10 bps costs)")
+    equal = np.full(len(symbols), 1 / len(symbols))
+    print_result(backtest(prices, equal, 1_000_000, "M", cost_rate=0.001))
+
+    window = 252
+    previous: Optional[np.ndarray] = None
+
+    def max_sharpe(day: int, history: np.ndarray) -> np.ndarray:
+        """Maximum Sharpe ratio allocations over the last year (equal before)."""
+        global previous
+        if day < window:
+            return equal
+        returns = history[-window:]
+        returns = returns[1:] / returns[:-1] - 1
+        moments = compute_return_moments(np.nan_to_num(returns))
+        try:
+            previous = optimize_allocations(moments, previous)
+        except ValueError:
+            # No symbol beat the risk free rate over the last year.
+            return equal
+        return previous
+
+    print("Maximum Sharpe ratio allocations, reoptimized every quarter (10 bps costs)")
+    print_result(backtest(prices, max_sharpe, 1_000_000, "Q", cost_rate=0.001))
@@ -0,0 +1,216 @@
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from lesson_4 import get_bollinger_bands, get_rolling_mean, get_rolling_std
+
+
+def lttb(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """Returns the indices of n_out points keeping the shape of the series.
+
+    Largest-Triangle-Three-Buckets: the first and last points are kept, the
+    others are split into n_out - 2 buckets, and from each bucket the point
+    forming the largest triangle with the previously kept point and the
+    average of the next bucket is kept.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.intp)
+    # The last bucket's next bucket is the last point.
+    next_edges = np.append(edges[2:], n)
+
+    indices = np.empty(n_out, dtype=np.intp)
+    indices[0], indices[-1] = 0, n - 1
+    kept = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        next_x = x[end : next_edges[i]].mean()
+        next_y = y[end : next_edges[i]].mean()
+        # Twice the triangle areas (the factor does not change the largest).
+        areas = np.abs(
+            (x[kept] - next_x) * (y[start:end] - y[kept])
+            - (x[kept] - x[start:end]) * (next_y - y[kept])
+        )
+        kept = start + np.argmax(areas)
+        indices[i + 1] = kept
+    return indices
+
+
+def minmax(y: np.ndarray, n_buckets: int) -> np.ndarray:
+    """Returns the indices of the minimum and maximum of every bucket of points, in order.
+
+    It keeps every peak and trough (at most 2 * n_buckets points), with no loop.
+    """
+    n = len(y)
+    if 2 * n_buckets >= n:
+        return np.arange(n)
+    buckets = np.arange(n) * n_buckets // n
+    # Sorted by bucket, then value: the first and last of every bucket
+    # are its minimum and maximum.
+    order = np.lexsort((y, buckets))
+    starts = np.searchsorted(buckets, np.arange(n_buckets))
+    stops = np.append(starts[1:], n) - 1
+    return np.unique(np.concatenate([[0, n - 1], order[starts], order[stops]]))
+
+
+def downsample(
+    series: pd.Series, n_points: int, method: str = "lttb"
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Returns about n_points (dates, values) of the series, without its missing values."""
+    series = series.dropna()
+    x = series.index.to_numpy()
+    y = series.to_numpy(dtype=np.float64)
+    if method == "lttb":
+        indices = lttb(x.astype(np.int64), y, n_points)
+    elif method == "minmax":
+        indices = minmax(y, n_points // 2)
+    else:
+        raise ValueError(f"Unknown downsampling method: {method}")
+    return x[indices], y[indices]
+
+
+def render_chart(
+    df: pd.DataFrame,
+    path: Path,
+    title: str = "Stock Prices",
+    ylabel: str = "Price",
+    width: int = 1000,
+    height: int = 400,
+    method: str = "lttb",
+) -> Path:
+    """Renders the columns of the dataframe (see `lesson_2.plot_data`) to a PNG or SVG file.
+
+    No display is needed: the figure is drawn by the Agg backend directly,
+    without pyplot. Every column is downsampled to about one point per pixel
+    of the `width`, so long series render as fast as short ones.
+    """
+    dpi = 100
+    figure = Figure(figsize=(width / dpi, height / dpi), dpi=dpi)
+    FigureCanvasAgg(figure)
+    axis = figure.add_subplot()
+    for column in df.columns:
+        axis.plot(*downsample(df[column], width, method), label=column, linewidth=1)
+    axis.set_title(title)
+    axis.set_xlabel("Date")
+    axis.set_ylabel(ylabel)
+    axis.legend(loc="upper left")
+    figure.savefig(path)
+    return path
+
+
+def render_symbol(
+    symbol: str,
+    prices: pd.DataFrame,
+    out_dir: Path,
+    fmt: str = "png",
+    window: int = 20,
+    width: int = 1000,
+    height: int = 400,
+    method: str = "lttb",
+) -> Path:
+    """Renders the normalized prices of the symbol and SPY, with the symbol's Bollinger Bands."""
+    price = prices[symbol]
+    # Normalize from the first day both symbols have a price.
+    pair = prices[["SPY", symbol]].dropna()
+    normalized = pair / pair.iloc[0] if len(pair) else pair
+    rm = get_rolling_mean(price, window)
+    rstd = get_rolling_std(price, window)
+    upper_band, lower_band = get_bollinger_bands(rm, rstd)
+    bands = pd.DataFrame(
+        {
+            symbol: price,
+            "Rolling Mean": rm,
+            "Upper Band": upper_band,
+            "Lower Band": lower_band,
+        }
+    )
+
+    dpi = 100
+    figure = Figure(figsize=(width / dpi, 2 * height / dpi), dpi=dpi)
+    FigureCanvasAgg(figure)
+    top, bottom = figure.subplots(2, 1, sharex=True)
+    for column in normalized.columns:
+        top.plot(*downsample(normalized[column], width, method), label=column)
+    top.set_title(f"{symbol} and SPY (normalized)")
+    top.legend(loc="upper left")
+    for column in bands.columns:
+        bottom.plot(*downsample(bands[column], width, method), label=column)
+    bottom.set_title(f"{symbol} Bollinger Bands ({window} days)")
+    bottom.set_xlabel("Date")
+    bottom.legend(loc="upper left")
+    figure.tight_layout()
+
+    path = out_dir / f"{symbol}.{fmt}"
+    figure.savefig(path)
+    return path
+
+
+def _render_symbols(
+    symbols: List[str], prices: pd.DataFrame, out_dir: Path, options: dict
+) -> List[Path]:
+    return [render_symbol(symbol, prices, out_dir, **options) for symbol in symbols]
+
+
+def render_chart_pack(
+    prices: pd.DataFrame,
+    out_dir: Path,
+    fmt: str = "png",
+    window: int = 20,
+    width: int = 1000,
+    height: int = 400,
+    method: str = "lttb",
+    batch_size: int = 16,
+    max_workers: Optional[int] = None,
+) -> List[Path]:
+    """Renders a chart (see `render_symbol`) for every symbol of the prices but SPY.
+
+    The prices are loaded once by the caller (e.g. `lesson_2.get_stock_prices`).
+    The symbols are rendered in batches of `batch_size` by a pool of
+    `max_workers` processes (in this process when it is 1); each batch is sent
+    with its own columns only.
+    """
+    out_dir.mkdir(parents=True, exist_ok=True)
+    options = dict(fmt=fmt, window=window, width=width, height=height, method=method)
+    symbols = [symbol for symbol in prices.columns if symbol != "SPY"]
+    batches = [
+        symbols[start : start + batch_size]
+        for start in range(0, len(symbols), batch_size)
+    ]
+    if max_workers == 1 or len(batches) <= 1:
+        return [
+            path
+            for batch in batches
+            for path in _render_symbols(batch, prices, out_dir, options)
+        ]
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            executor.submit(
+                _render_symbols, batch, prices[["SPY"] + batch], out_dir, options
+            )
+            for batch in batches
+        ]
+        return [path for future in futures for path in future.result()]
+
+
+if __name__ == "__main__":
+    import time
+
+    from lesson_2 import get_stock_prices
+
+    symbols = sorted(
+        path.stem for path in Path("data").glob("*.csv") if path.stem != "SPY"
+    )
+    prices = get_stock_prices(symbols, "2000-01-01", "2012-12-31")
+
+    print(f"Rendering charts of {len(symbols)} symbols to charts/...")
+    start = time.perf_counter()
+    paths = render_chart_pack(prices, Path("charts"))
+    print(f"Rendered {len(paths)} charts in {time.perf_counter() - start:.1f}s")
@@ -0,0 +1,57 @@
+from typing import List, NamedTuple
+
+import numpy as np
+import pandas as pd
+
+
+class CompactPrices(NamedTuple):
+    """Prices of many symbols as one contiguous (T x N) float32 array.
+
+    It takes half the memory of the float64 dataframe returned by
+    `lesson_2.get_stock_prices`, with a single date axis and symbol list.
+    `lesson_2.normalize_prices`, `lesson_4.compute_daily_returns`,
+    `lesson_4.compute_cumulative_returns` and `lesson_7.compute_portfolio_value`
+    accept it and keep working in float32.
+
+    Accuracy versus float64: every stored price is rounded to 24 significant
+    bits, i.e. a relative error of at most u = 2^-24 (about 6e-8, or $0.00006 on
+    a $1,000 price). A price ratio (normalized prices, portfolio values) then
+    has a relative error of at most 3u (about 1.8e-7), and a return r (daily or
+    cumulative) an absolute error of at most 4u * (1 + |r|) (about 2.4e-7 for
+    small returns). Portfolio values are summed in float64 to keep the 3u bound.
+    """
+
+    values: np.ndarray
+    dates: pd.DatetimeIndex
+    symbols: List[str]
+
+    def normalized(self) -> "CompactPrices":
+        """Returns the prices divided by the first row (see `lesson_2.normalize_prices`)."""
+        return self._replace(values=self.values / self.values[0])
+
+    def daily_returns(self) -> "CompactPrices":
+        """Returns the daily returns (see `lesson_4.compute_daily_returns`)."""
+        returns = np.empty_like(self.values)
+        returns[0] = 0
+        np.divide(self.values[1:], self.values[:-1], out=returns[1:])
+        returns[1:] -= 1
+        returns[np.isnan(returns)] = 0
+        return self._replace(values=returns)
+
+    def cumulative_returns(self) -> "CompactPrices":
+        """Returns the cumulative returns (see `lesson_4.compute_cumulative_returns`)."""
+        returns = self.values / self.values[0]
+        returns -= 1
+        return self._replace(values=returns)
+
+    def portfolio_value(self, allocations: List[float], budget: float) -> pd.Series:
+        """Returns the value of the portfolio (see `lesson_7.compute_portfolio_value`)."""
+        normalized = self.values / self.values[0]
+        normalized *= np.asarray(allocations, dtype=np.float32)
+        # Missing prices add nothing, as with pandas' sum skipping NaNs.
+        value = np.nansum(normalized, axis=1, dtype=np.float64) * budget
+        return pd.Series(value, index=self.dates)
+
+    def to_frame(self) -> pd.DataFrame:
+        """Returns the prices as a (float32) dataframe."""
+        return pd.DataFrame(self.values, index=self.dates, columns=self.symbols)
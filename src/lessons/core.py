@@ -0,0 +1,55 @@
+# The numeric functions of the lessons, importable without matplotlib
+# (plotting functions import it on first use), e.g. for batch workers:
+#
+#     from core import compute_daily_returns, get_stock_prices
+
+from compact_prices import CompactPrices
+from curve_fitting import FitResult, fit_curves, fit_polys
+from incremental import IncrementalAnalytics
+from lesson_2 import get_compact_prices, get_stock_prices, normalize_prices
+from lesson_4 import (
+    compute_cumulative_returns,
+    compute_daily_returns,
+    get_bollinger_bands,
+    get_rolling_mean,
+    get_rolling_std,
+)
+from lesson_5 import fill_missing_values
+from lesson_7 import (
+    compute_portfolio_average_daily_return,
+    compute_portfolio_cumulative_return,
+    compute_portfolio_daily_returns,
+    compute_portfolio_risk,
+    compute_portfolio_value,
+    compute_sharpe_ratio,
+)
+from portfolio_batch import PortfolioStats, evaluate_portfolios
+from rolling_windows import RollingStats, iter_rolling_mean_std, rolling_mean_std
+
+__all__ = [
+    "CompactPrices",
+    "FitResult",
+    "IncrementalAnalytics",
+    "PortfolioStats",
+    "RollingStats",
+    "compute_cumulative_returns",
+    "compute_daily_returns",
+    "compute_portfolio_average_daily_return",
+    "compute_portfolio_cumulative_return",
+    "compute_portfolio_daily_returns",
+    "compute_portfolio_risk",
+    "compute_portfolio_value",
+    "compute_sharpe_ratio",
+    "evaluate_portfolios",
+    "fill_missing_values",
+    "fit_curves",
+    "fit_polys",
+    "get_bollinger_bands",
+    "get_compact_prices",
+    "get_rolling_mean",
+    "get_rolling_std",
+    "get_stock_prices",
+    "iter_rolling_mean_std",
+    "normalize_prices",
+    "rolling_mean_std",
+]
@@ -0,0 +1,128 @@
+import io
+import os
+import tempfile
+import zipfile
+from functools import lru_cache
+from pathlib import Path
+from typing import NamedTuple, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import count
+
+INDEX_DIR = Path("data/index")
+
+# Dates are written as YYYY-MM-DD at the start of every row.
+DATE_WIDTH = 10
+
+
+class CsvIndex(NamedTuple):
+    """Date and byte offset of every row of a CSV file, in file order."""
+
+    dates: np.ndarray
+    # One more than the number of rows: the last offset is the end of the file.
+    offsets: np.ndarray
+
+    def row_range(self, start_date: str, end_date: str) -> Tuple[int, int]:
+        """Returns [first, stop) rows of the file within the date range.
+
+        The rows are contiguous because the file is sorted by date
+        (the files in data/ are sorted newest first).
+        """
+        start = np.datetime64(pd.Timestamp(start_date).date(), "D")
+        end = np.datetime64(pd.Timestamp(end_date).date(), "D")
+        n = len(self.dates)
+        if n > 1 and self.dates[0] > self.dates[-1]:
+            ascending = self.dates[::-1]
+            lo = np.searchsorted(ascending, start, side="left")
+            hi = np.searchsorted(ascending, end, side="right")
+            return n - hi, n - lo
+        lo = np.searchsorted(self.dates, start, side="left")
+        hi = np.searchsorted(self.dates, end, side="right")
+        return lo, hi
+
+
+def index_path(csv_path: Path) -> Path:
+    """Returns the sidecar index file path of the CSV file."""
+    return INDEX_DIR / f"{csv_path.stem}.npz"
+
+
+def build_index(csv_path: Path) -> CsvIndex:
+    """Scans the CSV file once and writes its sidecar index."""
+    with open(csv_path, "rb") as f:
+        buffer = np.frombuffer(f.read(), dtype=np.uint8)
+
+    # Every row starts right after a newline (the first line is the header).
+    starts = np.flatnonzero(buffer == ord("\n")) + 1
+    offsets = np.append(starts[starts < len(buffer)], len(buffer))
+
+    # Gather the date characters of all rows at once.
+    date_bytes = buffer[offsets[:-1, None] + np.arange(DATE_WIDTH)]
+    dates = date_bytes.copy().view(f"S{DATE_WIDTH}").ravel().astype("datetime64[D]")
+
+    index = CsvIndex(dates, offsets)
+    INDEX_DIR.mkdir(parents=True, exist_ok=True)
+    # Written to a temporary file first, so that other processes never load
+    # a partly written index.
+    with tempfile.NamedTemporaryFile(
+        dir=INDEX_DIR, prefix=f".{csv_path.stem}.", suffix=".npz", delete=False
+    ) as f:
+        np.savez(f, dates=index.dates, offsets=index.offsets)
+    os.replace(f.name, index_path(csv_path))
+    return index
+
+
+@lru_cache(maxsize=2048)
+def _load_index(csv_path: Path, mtime: float) -> CsvIndex:
+    path = index_path(csv_path)
+    try:
+        if os.stat(path).st_mtime >= mtime:
+            with np.load(path) as index:
+                return CsvIndex(index["dates"], index["offsets"])
+    except (FileNotFoundError, zipfile.BadZipFile):
+        # Missing, or written by an older version without a temporary file.
+        pass
+    return build_index(csv_path)
+
+
+def load_index(csv_path: Path) -> CsvIndex:
+    """Returns the sidecar index of the CSV file, (re)building it when it is missing or stale."""
+    return _load_index(csv_path, os.stat(csv_path).st_mtime)
+
+
+def read_csv_range(
+    csv_path: Path,
+    start_date: str,
+    end_date: str,
+    usecols: Sequence[str] = ("Date", "Adj Close"),
+) -> pd.DataFrame:
+    """Reads only the rows of the CSV file from start to end date.
+
+    The file is not parsed as a whole: the sidecar index gives the byte range
+    of the rows, and only the header and that range are read.
+    """
+    index = load_index(csv_path)
+    first, stop = index.row_range(start_date, end_date)
+    with open(csv_path, "rb") as f:
+        header = f.readline()
+        f.seek(index.offsets[first])
+        rows = (
+            f.read(index.offsets[stop] - index.offsets[first]) if stop > first else b""
+        )
+    df = pd.read_csv(
+        io.BytesIO(header + rows),
+        index_col="Date",
+        parse_dates=True,
+        usecols=list(usecols),
+    )
+    count("rows_read", len(df))
+    count("bytes_read", len(header) + len(rows))
+    return df
+
+
+if __name__ == "__main__":
+    index = load_index(Path("data/AAPL.csv"))
+    print(f"AAPL.csv has {len(index.dates)} rows, the first one is {index.dates[0]}")
+    print("AAPL in January 2010 (read through the index)")
+    print(read_csv_range(Path("data/AAPL.csv"), "2010-01-01", "2010-01-31"))
@@ -0,0 +1,242 @@
+from typing import Callable, NamedTuple
+
+import numpy as np
+
+# model(x, params) -> (B x n) values for the (B x P) params.
+Model = Callable[[np.ndarray, np.ndarray], np.ndarray]
+# jacobian(x, params) -> (B x n x P) derivatives of the values by the params.
+Jacobian = Callable[[np.ndarray, np.ndarray], np.ndarray]
+
+
+class FitResult(NamedTuple):
+    """Fitted coefficients and diagnostics of B series (one row/element per series)."""
+
+    # (B x P) coefficients (highest power first for polynomials, as np.polyval).
+    coeffs: np.ndarray
+    # Sum of squared errors, the error minimized by `lesson_8.error_poly`.
+    sse: np.ndarray
+    r_squared: np.ndarray
+    # Standard deviation of the residuals (with n - P degrees of freedom).
+    residual_std: np.ndarray
+    # Number of (non-missing) data points.
+    n_obs: np.ndarray
+    # Whether the iterations converged (for closed-form fits, whether the
+    # series could be fitted).
+    converged: np.ndarray
+
+
+def _as_batch(x: np.ndarray, y: np.ndarray):
+    """Returns the (B x n) values and the (n,) or (B x n) points of the series."""
+    y = np.atleast_2d(np.asarray(y, dtype=np.float64))
+    x = np.asarray(x, dtype=np.float64)
+    if x.ndim == 2 and len(x) == 1:
+        x = x[0]
+    return x, y
+
+
+def _diagnostics(
+    y: np.ndarray, residuals: np.ndarray, missing: np.ndarray, n_params: int
+) -> tuple:
+    """Returns the sse, r_squared, residual_std and n_obs of the series."""
+    n_obs = (~missing).sum(axis=1)
+    with np.errstate(over="ignore", divide="ignore", invalid="ignore"):
+        sse = np.sum(np.where(missing, 0, residuals) ** 2, axis=1)
+        mean = np.nansum(y, axis=1) / n_obs
+        sst = np.sum(np.where(missing, 0, y - mean[:, None]) ** 2, axis=1)
+        r_squared = 1 - sse / sst
+        residual_std = np.sqrt(sse / (n_obs - n_params))
+    return sse, r_squared, residual_std, n_obs
+
+
+def fit_polys(x: np.ndarray, y: np.ndarray, degree: int = 1) -> FitResult:
+    """Fits a polynomial to every series at once, by least squares (in closed form).
+
+    `y` holds B series of n values (one per row), `x` their n points, shared
+    (n,) or per series (B x n). Missing values (NaN) of a series are ignored.
+    The coefficients minimize the same error as `lesson_8.fit_line` (degree 1,
+    [slope, intercept]) and `lesson_8.fit_poly`, exactly and without plotting.
+
+    Series with fewer than degree + 1 (distinct) points, e.g. all missing,
+    cannot be fitted: their coefficients are NaN and they have not `converged`.
+
+    Series with the same points and no missing values are solved together by
+    a single least squares call. Otherwise the (B x n x P) Vandermonde matrices
+    are factored together, with QR.
+    """
+    x, y = _as_batch(x, y)
+    n_params = degree + 1
+    missing = np.isnan(y)
+    # Powers of x, highest first (as np.vander).
+    vander = x[..., None] ** np.arange(degree, -1, -1)
+    # Scale the columns to 1 (as np.polyfit does), powers of large xs overflow
+    # the conditioning otherwise.
+    norms = np.sqrt(np.sum(vander**2, axis=-2, keepdims=True))
+    norms[norms == 0] = 1
+    scaled = vander / norms
+    coeffs = np.full((len(y), n_params), np.nan)
+    solved = np.zeros(len(y), dtype=bool)
+
+    if x.ndim == 1 and not missing.any() and len(x) >= n_params:
+        solution, _, rank, _ = np.linalg.lstsq(scaled, y.T, rcond=None)
+        if rank == n_params:
+            coeffs = solution.T / norms
+            solved[:] = True
+    elif x.shape[-1] >= n_params:
+        scaled = np.where(
+            missing[:, :, None],
+            0,
+            np.broadcast_to(scaled, (len(y),) + scaled.shape[-2:]),
+        )
+        q, r = np.linalg.qr(scaled)
+        # R is singular (its diagonal has a 0) for too few distinct points.
+        diagonal = np.abs(np.diagonal(r, axis1=-2, axis2=-1))
+        solved = np.all(diagonal > 1e-10, axis=1)
+        qty = np.einsum("bnp,bn->bp", q[solved], np.where(missing, 0, y)[solved])
+        solution = np.linalg.solve(r[solved], qty[:, :, None])[:, :, 0]
+        coeffs[solved] = (
+            solution
+            / norms.reshape(-1, n_params)[solved if x.ndim == 2 else slice(None)]
+        )
+
+    fitted = (vander @ coeffs[:, :, None])[:, :, 0]
+    sse, r_squared, residual_std, n_obs = _diagnostics(y, y - fitted, missing, n_params)
+    sse, r_squared, residual_std = (
+        np.where(solved, values, np.nan) for values in (sse, r_squared, residual_std)
+    )
+    return FitResult(coeffs, sse, r_squared, residual_std, n_obs, solved)
+
+
+def fit_curves(
+    model: Model,
+    jacobian: Jacobian,
+    x: np.ndarray,
+    y: np.ndarray,
+    initial: np.ndarray,
+    max_iter: int = 100,
+    tol: float = 1e-10,
+) -> FitResult:
+    """Fits a nonlinear model to every series at once (Levenberg-Marquardt).
+
+    `initial` holds the (P,) or (S x P) starting params, the same for every
+    series, or (B x S x P) ones per series. Every series is fitted from every
+    start at once, and the fit with the smallest error is kept (multi-start).
+
+    The model and its analytic jacobian are evaluated for all B x S fits in
+    one vectorized call per iteration, and their damped normal equations are
+    solved together. A fit stops when its error improves by less than `tol`
+    (relatively); it has not `converged` when it hits `max_iter` first, or
+    when no step improves its error anymore (the damping blows up).
+    Missing values (NaN) of a series are ignored.
+
+    Series with fewer values than params (e.g. all missing), or with a
+    non-finite error from every start, cannot be fitted: their coefficients
+    and diagnostics are NaN and they have not `converged`.
+    """
+    x, y = _as_batch(x, y)
+    n_series = len(y)
+    initial = np.asarray(initial, dtype=np.float64)
+    if initial.ndim < 3:
+        initial = np.broadcast_to(
+            np.atleast_2d(initial), (n_series,) + np.atleast_2d(initial).shape
+        )
+    n_starts, n_params = initial.shape[1:]
+
+    # Every (series, start) pair is one fit, series-major.
+    params = initial.reshape(-1, n_params).copy()
+    fit_y = np.repeat(y, n_starts, axis=0)
+    fit_x = x if x.ndim == 1 else np.repeat(x, n_starts, axis=0)
+    missing = np.isnan(fit_y)
+    targets = np.where(missing, 0, fit_y)
+
+    def residuals_of(params: np.ndarray) -> np.ndarray:
+        return np.where(missing, 0, model(fit_x, params) - targets)
+
+    with np.errstate(over="ignore", invalid="ignore"):
+        residuals = residuals_of(params)
+        sse = np.sum(residuals**2, axis=1)
+    fittable = ((~missing).sum(axis=1) >= n_params) & np.isfinite(sse)
+    damping = np.full(len(params), 1e-3)
+    # A perfect fit cannot improve, it has converged already.
+    converged = fittable & (sse == 0)
+    active = fittable & ~converged
+    identity = np.eye(n_params)
+
+    for _ in range(max_iter):
+        if not active.any():
+            break
+        # The fits that cannot be fitted (or stopped) are evaluated too, but
+        # not moved.
+        with np.errstate(over="ignore", invalid="ignore"):
+            jac = np.where(missing[:, :, None], 0, jacobian(fit_x, params))
+            jtj = np.einsum("bnp,bnq->bpq", jac, jac)
+            jtr = np.einsum("bnp,bn->bp", jac, residuals)
+            # Marquardt's scaling of the damping by the diagonal of J^T J.
+            diagonal = np.einsum("bpp->bp", jtj)[:, :, None] * identity
+        system = jtj + damping[:, None, None] * (diagonal + 1e-12 * identity)
+        step = np.linalg.solve(system, -jtr[:, :, None])[:, :, 0]
+
+        candidate = params + np.where(active[:, None], step, 0)
+        with np.errstate(over="ignore", invalid="ignore"):
+            candidate_residuals = residuals_of(candidate)
+            candidate_sse = np.sum(candidate_residuals**2, axis=1)
+        improved = active & (candidate_sse < sse)
+
+        # Stop the fits whose error barely changes, either way: at the minimum
+        # a step only changes the error by rounding errors.
+        with np.errstate(invalid="ignore"):
+            change = np.abs(sse - candidate_sse) / np.maximum(sse, 1e-300)
+        stopped = active & (change < tol)
+        converged |= stopped
+        active &= ~stopped & (damping < 1e16)
+
+        params[improved] = candidate[improved]
+        residuals[improved] = candidate_residuals[improved]
+        sse[improved] = candidate_sse[improved]
+        damping = np.where(improved, damping / 10, damping * 10)
+
+    # Keep the best start of every series.
+    errors = np.where(fittable, np.nan_to_num(sse, nan=np.inf), np.inf)
+    best = np.argmin(errors.reshape(n_series, n_starts), axis=1)
+    picked = np.arange(n_series) * n_starts + best
+    fitted = fittable[picked]
+    sse, r_squared, residual_std, n_obs = _diagnostics(
+        y, residuals[picked], missing[picked], n_params
+    )
+    coeffs, sse, r_squared, residual_std = (
+        np.where(fitted if values.ndim == 1 else fitted[:, None], values, np.nan)
+        for values in (params[picked], sse, r_squared, residual_std)
+    )
+    return FitResult(coeffs, sse, r_squared, residual_std, n_obs, converged[picked])
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+
+    print("Fitting lines to 10,000 noisy series")
+    x = np.linspace(0, 10, 20)
+    lines = np.column_stack([rng.uniform(-5, 5, 10_000), rng.uniform(-5, 5, 10_000)])
+    y = lines[:, :1] * x + lines[:, 1:] + rng.normal(0, 3.0, (10_000, len(x)))
+    result = fit_polys(x, y, degree=1)
+    print("First fitted lines:", result.coeffs[:3].round(3))
+    print("Median R^2:", np.median(result.r_squared))
+
+    print("Fitting degree 4 polynomials to 1,000 noisy series")
+    x = np.linspace(-100, 100, 50)
+    y = np.polyval([1.5, 10, 5, 60, 50], x) + rng.normal(0, 5e6, (1_000, len(x)))
+    print("First fitted polynomial:", fit_polys(x, y, degree=4).coeffs[0])
+
+    print("Fitting exponentials a * exp(b * x) to 1,000 noisy series (3 starts)")
+
+    def exponential(x: np.ndarray, params: np.ndarray) -> np.ndarray:
+        return params[:, :1] * np.exp(params[:, 1:] * x)
+
+    def exponential_jacobian(x: np.ndarray, params: np.ndarray) -> np.ndarray:
+        growth = np.exp(params[:, 1:] * x)
+        return np.stack([growth, params[:, :1] * x * growth], axis=-1)
+
+    x = np.linspace(0, 2, 30)
+    y = 2 * np.exp(0.8 * x) + rng.normal(0, 0.1, (1_000, len(x)))
+    starts = np.array([[1.0, 0.0], [1.0, 1.0], [1.0, -1.0]])
+    result = fit_curves(exponential, exponential_jacobian, x, y, starts)
+    print("Mean fitted params:", result.coeffs.mean(axis=0))
+    print("Converged:", result.converged.mean())
@@ -0,0 +1,91 @@
+import threading
+from collections import OrderedDict
+from typing import Hashable, NamedTuple, Optional
+
+import pandas as pd
+
+from instrumentation import count
+
+
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+    nbytes: int
+    max_bytes: int
+
+
+class FrameCache:
+    """A least-recently-used cache of dataframes bounded by their total memory size.
+
+    The cache can be shared between threads.
+
+    NOTE: Cached dataframes are shared between callers, so they must not be
+    modified in place.
+    """
+
+    def __init__(self, max_bytes: int = 256 * 2**20):
+        self.max_bytes = max_bytes
+        self._frames: "OrderedDict[Hashable, pd.DataFrame]" = OrderedDict()
+        self._nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    def __contains__(self, key: Hashable) -> bool:
+        """Returns whether the key is cached (without counting a hit or miss)."""
+        with self._lock:
+            return key in self._frames
+
+    def get(self, key: Hashable) -> Optional[pd.DataFrame]:
+        """Returns the cached dataframe, or None if the key is not cached."""
+        with self._lock:
+            df = self._frames.get(key)
+            if df is None:
+                self.misses += 1
+                count("cache_misses")
+                return None
+            self.hits += 1
+            count("cache_hits")
+            self._frames.move_to_end(key)
+            return df
+
+    def put(self, key: Hashable, df: pd.DataFrame) -> None:
+        """Caches the dataframe, evicting the least recently used ones if needed."""
+        nbytes = int(df.memory_usage(index=True).sum())
+        if nbytes > self.max_bytes:
+            # It would evict everything else and still not fit.
+            return
+        with self._lock:
+            if key in self._frames:
+                self._remove(key)
+            self._frames[key] = df
+            self._nbytes += nbytes
+            while self._nbytes > self.max_bytes:
+                self._remove(next(iter(self._frames)))
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Removes all dataframes and resets the counters."""
+        with self._lock:
+            self._frames.clear()
+            self._nbytes = 0
+            self.hits = self.misses = self.evictions = 0
+
+    def info(self) -> CacheInfo:
+        """Returns the cache counters and its current size."""
+        with self._lock:
+            return CacheInfo(
+                self.hits,
+                self.misses,
+                self.evictions,
+                len(self._frames),
+                self._nbytes,
+                self.max_bytes,
+            )
+
+    def _remove(self, key: Hashable) -> None:
+        df = self._frames.pop(key)
+        self._nbytes -= int(df.memory_usage(index=True).sum())
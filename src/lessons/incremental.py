@@ -0,0 +1,263 @@
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from lesson_2 import normalize_prices
+from lesson_4 import (
+    compute_cumulative_returns,
+    compute_daily_returns,
+    get_rolling_mean,
+    get_rolling_std,
+)
+
+
+class IncrementalAnalytics:
+    """Prices and their derived series, extended by only the new rows when days arrive.
+
+    Kept (T x N) series: normalized prices, daily and cumulative returns
+    (see lesson_2 and lesson_4), the rolling mean and standard deviation for
+    every window, and the value of a portfolio (see
+    `lesson_7.compute_portfolio_value`) when allocations are given.
+
+    The last processed date is the high-water mark. `update` takes the latest
+    prices (e.g. `lesson_2.get_stock_prices` read again), appends the rows
+    after the high-water mark and computes the derived rows from them (and
+    the last `window` rows) only, in O(new rows x symbols).
+
+    A split or dividend back-adjusts a symbol's whole Adj Close history, which
+    changes its price on the high-water mark too. The last `check_rows` known
+    rows are compared with the latest prices, and only the symbols whose
+    prices changed are recomputed over the whole history.
+    """
+
+    def __init__(
+        self,
+        prices: pd.DataFrame,
+        windows: Sequence[int] = (20,),
+        allocations: Optional[Sequence[float]] = None,
+        budget: float = 1.0,
+        check_rows: int = 1,
+    ):
+        self.symbols = list(prices.columns)
+        self.windows = list(windows)
+        self.allocations = (
+            None if allocations is None else np.asarray(allocations, dtype=np.float64)
+        )
+        self.budget = budget
+        self.check_rows = check_rows
+
+        # Series are stored in arrays with spare rows (doubled when full),
+        # so that appending a day does not copy the history.
+        self._length = 0
+        self._dates = np.empty(0, dtype="datetime64[ns]")
+        self._series: Dict[str, np.ndarray] = {
+            name: np.empty((0, len(self.symbols))) for name in self._names()
+        }
+        self._series["portfolio_value"] = np.empty((0, 1))
+        self._append(prices)
+        if self._length:
+            self._recompute(list(range(len(self.symbols))))
+
+    @property
+    def high_water_mark(self) -> Optional[pd.Timestamp]:
+        """Returns the last processed date (None when there is none yet)."""
+        return pd.Timestamp(self._dates[self._length - 1]) if self._length else None
+
+    def _frame(self, name: str) -> pd.DataFrame:
+        return pd.DataFrame(
+            self._series[name][: self._length],
+            index=pd.DatetimeIndex(self._dates[: self._length]),
+            columns=self.symbols,
+        )
+
+    @property
+    def prices(self) -> pd.DataFrame:
+        return self._frame("prices")
+
+    @property
+    def normalized(self) -> pd.DataFrame:
+        return self._frame("normalized")
+
+    @property
+    def daily_returns(self) -> pd.DataFrame:
+        return self._frame("daily_returns")
+
+    @property
+    def cumulative_returns(self) -> pd.DataFrame:
+        return self._frame("cumulative_returns")
+
+    def rolling_mean(self, window: int) -> pd.DataFrame:
+        return self._frame(f"rolling_mean_{window}")
+
+    def rolling_std(self, window: int) -> pd.DataFrame:
+        return self._frame(f"rolling_std_{window}")
+
+    @property
+    def portfolio_value(self) -> pd.Series:
+        return pd.Series(
+            self._series["portfolio_value"][: self._length, 0],
+            index=pd.DatetimeIndex(self._dates[: self._length]),
+        )
+
+    def _names(self) -> List[str]:
+        names = ["prices", "normalized", "daily_returns", "cumulative_returns"]
+        for window in self.windows:
+            names += [f"rolling_mean_{window}", f"rolling_std_{window}"]
+        return names
+
+    def _append(self, prices: pd.DataFrame) -> int:
+        """Appends the prices' rows to the stored prices and returns their first row."""
+        start, stop = self._length, self._length + len(prices)
+        capacity = len(self._dates)
+        if stop > capacity:
+            capacity = max(stop, 2 * capacity)
+            dates = np.empty(capacity, dtype="datetime64[ns]")
+            dates[:start] = self._dates[:start]
+            self._dates = dates
+            for name in self._names() + ["portfolio_value"]:
+                width = 1 if name == "portfolio_value" else len(self.symbols)
+                series = np.empty((capacity, width))
+                series[:start] = self._series[name][:start]
+                self._series[name] = series
+        self._dates[start:stop] = prices.index.values
+        self._series["prices"][start:stop] = prices.to_numpy(dtype=np.float64)
+        self._length = stop
+        return start
+
+    def _recompute(self, columns: List[int]) -> None:
+        """Recomputes the derived series of the symbols (positions) over the whole history."""
+        prices = self.prices.iloc[:, columns]
+        n = self._length
+        self._series["normalized"][:n, columns] = normalize_prices(prices)
+        self._series["daily_returns"][:n, columns] = compute_daily_returns(prices)
+        self._series["cumulative_returns"][:n, columns] = compute_cumulative_returns(
+            prices
+        )
+        for window in self.windows:
+            self._series[f"rolling_mean_{window}"][:n, columns] = get_rolling_mean(
+                prices, window
+            )
+            self._series[f"rolling_std_{window}"][:n, columns] = get_rolling_std(
+                prices, window
+            )
+        self._recompute_portfolio_value(0)
+
+    def _recompute_portfolio_value(self, start: int) -> None:
+        """Recomputes the portfolio value from the row on (pandas' sum skips NaNs)."""
+        if self.allocations is None:
+            return
+        normalized = self._series["normalized"][start : self._length]
+        self._series["portfolio_value"][start : self._length, 0] = self.budget * (
+            np.nan_to_num(normalized) @ self.allocations
+        )
+
+    def _extend(self, start: int) -> None:
+        """Computes the derived rows from `start` on, from the new and last `window` rows."""
+        series = self._series
+        n = self._length
+        prices = series["prices"]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            series["normalized"][start:n] = prices[start:n] / prices[0]
+            series["cumulative_returns"][start:n] = series["normalized"][start:n] - 1
+            if start == 0:
+                series["daily_returns"][0] = 0
+            first = max(start, 1)
+            returns = prices[first:n] / prices[first - 1 : n - 1] - 1
+        # As `compute_daily_returns`: missing returns become 0.
+        series["daily_returns"][first:n] = np.where(np.isnan(returns), 0, returns)
+
+        for window in self.windows:
+            block = pd.DataFrame(prices[max(0, start - window + 1) : n])
+            series[f"rolling_mean_{window}"][start:n] = get_rolling_mean(
+                block, window
+            ).to_numpy()[-(n - start) :]
+            series[f"rolling_std_{window}"][start:n] = get_rolling_std(
+                block, window
+            ).to_numpy()[-(n - start) :]
+        self._recompute_portfolio_value(start)
+
+    def _adjusted(
+        self, prices: pd.DataFrame, known: pd.DatetimeIndex, adjusted: List[int]
+    ) -> np.ndarray:
+        """Returns the back-adjusted history of the symbols (positions) on the known dates.
+
+        Known dates missing from the prices (only recent bars were given) are
+        rescaled by the ratio of the new to the old price on the first known
+        date the prices have.
+        """
+        history = prices.reindex(known).iloc[:, adjusted].to_numpy(dtype=np.float64)
+        covered = known.isin(prices.index)
+        if covered.all():
+            return history
+        first = np.argmax(covered)
+        old = self._series["prices"][: self._length, adjusted]
+        ratio = history[first] / old[first]
+        if np.isnan(ratio).any():
+            symbols = [self.symbols[column] for column in adjusted]
+            raise ValueError(
+                f"Cannot rescale the history of {symbols}: pass their full history"
+            )
+        history[~covered] = old[~covered] * ratio
+        return history
+
+    def update(self, prices: pd.DataFrame) -> List[str]:
+        """Processes the latest prices and returns the back-adjusted (recomputed) symbols.
+
+        The prices can hold the full history or only the recent bars, as long
+        as they include the last `check_rows` known dates. Rows up to the
+        high-water mark are only compared (the last `check_rows` of them) to
+        detect back-adjustments, and read when a back-adjusted symbol is
+        recomputed.
+        """
+        if list(prices.columns) != self.symbols:
+            raise ValueError("The prices must have the same symbols (columns)")
+
+        adjusted: List[int] = []
+        known = pd.DatetimeIndex(self._dates[: self._length])
+        checked = known[-self.check_rows :]
+        if not checked.isin(prices.index).all():
+            # Back-adjustments could not be detected, and days could be missed.
+            raise ValueError(
+                f"The prices must include the last {len(checked)} known dates"
+            )
+        if self._length:
+            old = self._series["prices"][self._length - len(checked) : self._length]
+            new = prices.loc[checked].to_numpy(dtype=np.float64)
+            same = (old == new) | (np.isnan(old) & np.isnan(new))
+            adjusted = list(np.flatnonzero(~same.all(axis=0)))
+            if adjusted:
+                self._series["prices"][: self._length, adjusted] = self._adjusted(
+                    prices, known, adjusted
+                )
+                self._recompute(adjusted)
+
+        hwm = self.high_water_mark
+        new_rows = prices if hwm is None else prices.loc[prices.index > hwm]
+        if len(new_rows):
+            self._extend(self._append(new_rows))
+        return [self.symbols[column] for column in adjusted]
+
+
+if __name__ == "__main__":
+    from lesson_2 import get_stock_prices
+
+    symbols = ["SPY", "XOM", "GOOG", "GLD"]
+    prices = get_stock_prices(symbols, "2010-01-01", "2012-12-31")
+
+    # Start with 2010 and 2011, then add the days of 2012 one at a time.
+    split = prices.index.searchsorted(pd.Timestamp("2012-01-01"))
+    analytics = IncrementalAnalytics(
+        prices.iloc[:split], windows=[20], allocations=[0.4, 0.4, 0.1, 0.1]
+    )
+    for day in range(split, len(prices)):
+        analytics.update(prices.iloc[: day + 1])
+    print("High-water mark:", analytics.high_water_mark)
+    print("Portfolio value")
+    print(analytics.portfolio_value.tail())
+
+    print("A dividend of XOM back-adjusts its history")
+    adjusted = prices.copy()
+    adjusted["XOM"] *= 0.99
+    print("Recomputed symbols:", analytics.update(adjusted))
+    print(analytics.normalized.tail())
@@ -0,0 +1,239 @@
+import atexit
+import contextlib
+import functools
+import os
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+
+class CallRecord:
+    """Timing and counters of one call of an instrumented function."""
+
+    def __init__(self, stack: Tuple[str, ...]):
+        self.stack = stack
+        self.seconds = 0.0
+        # Time spent in instrumented functions called by this one.
+        self.child_seconds = 0.0
+        self.counters: Dict[str, int] = defaultdict(int)
+        self.start_bytes = 0
+        self.peak_bytes = 0
+
+    @property
+    def name(self) -> str:
+        return self.stack[-1]
+
+
+class Profile:
+    """Calls recorded while profiling is enabled.
+
+    Every thread has its own stack of active calls, so the calls of concurrent
+    threads are not nested in each other (see `propagate` for pools).
+    """
+
+    def __init__(self, trace_memory: bool = False):
+        self.trace_memory = trace_memory
+        self.records: List[CallRecord] = []
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def summary(self) -> str:
+        """Returns a table with the totals of every function."""
+        totals: Dict[str, Dict[str, float]] = {}
+        for record in self.records:
+            total = totals.setdefault(
+                record.name,
+                defaultdict(float, calls=0, seconds=0.0, max_seconds=0.0),
+            )
+            total["calls"] += 1
+            total["seconds"] += record.seconds
+            total["max_seconds"] = max(total["max_seconds"], record.seconds)
+            total["peak_mib"] = max(
+                total["peak_mib"], (record.peak_bytes - record.start_bytes) / 2**20
+            )
+            for counter, value in record.counters.items():
+                total[counter] += value
+
+        counters = sorted(
+            {counter for record in self.records for counter in record.counters}
+        )
+        columns = ["calls", "seconds", "max_seconds"] + counters
+        if self.trace_memory:
+            columns.append("peak_mib")
+        lines = [f"{'function':32}" + "".join(f"{column:>14}" for column in columns)]
+        for name, total in sorted(totals.items(), key=lambda item: -item[1]["seconds"]):
+            cells = [
+                f"{total[column]:14.4f}"
+                if "seconds" in column or "mib" in column
+                else f"{int(total[column]):14d}"
+                for column in columns
+            ]
+            lines.append(f"{name:32}" + "".join(cells))
+        return "\n".join(lines)
+
+    def folded_stacks(self) -> Dict[str, int]:
+        """Returns the self time (in microseconds) of every call stack."""
+        stacks: Dict[str, int] = defaultdict(int)
+        for record in self.records:
+            self_seconds = max(record.seconds - record.child_seconds, 0)
+            stacks[";".join(record.stack)] += int(self_seconds * 1e6)
+        return stacks
+
+    def write_folded(self, path: str) -> None:
+        """Writes the call stacks in the folded format of flamegraph.pl."""
+        with open(path, "w") as f:
+            for stack, microseconds in self.folded_stacks().items():
+                f.write(f"{stack} {microseconds}\n")
+
+    def _active(self) -> List[CallRecord]:
+        """Returns the active calls of the current thread, innermost last."""
+        active = getattr(self._local, "active", None)
+        if active is None:
+            active = self._local.active = []
+        return active
+
+    def _current(self) -> Optional[CallRecord]:
+        active = self._active()
+        return active[-1] if active else None
+
+    @contextlib.contextmanager
+    def _inherit(self, parent: Optional[CallRecord]) -> Iterator[None]:
+        """Nests the calls and counts of the current thread in the parent call."""
+        if parent is None:
+            yield
+            return
+        active = self._active()
+        active.append(parent)
+        try:
+            yield
+        finally:
+            active.pop()
+
+    def _enter(self, name: str) -> CallRecord:
+        active = self._active()
+        with self._lock:
+            parent = active[-1] if active else None
+            record = CallRecord((parent.stack if parent else ()) + (name,))
+            if self.trace_memory:
+                current, peak = tracemalloc.get_traced_memory()
+                if parent is not None:
+                    parent.peak_bytes = max(parent.peak_bytes, peak)
+                tracemalloc.reset_peak()
+                record.start_bytes = record.peak_bytes = current
+            active.append(record)
+            return record
+
+    def _exit(self, record: CallRecord, seconds: float) -> None:
+        active = self._active()
+        with self._lock:
+            record.seconds = seconds
+            if self.trace_memory:
+                record.peak_bytes = max(
+                    record.peak_bytes, tracemalloc.get_traced_memory()[1]
+                )
+            active.pop()
+            if active:
+                parent = active[-1]
+                parent.child_seconds += seconds
+                parent.peak_bytes = max(parent.peak_bytes, record.peak_bytes)
+            self.records.append(record)
+
+    def _count(self, counter: str, value: int) -> None:
+        record = self._current()
+        if record is not None:
+            # Counts are attributed to the innermost active call of the thread.
+            with self._lock:
+                record.counters[counter] += value
+
+
+_profile: Optional[Profile] = None
+
+
+def instrument(fn: Callable) -> Callable:
+    """Records the calls of the function while profiling is enabled.
+
+    When profiling is disabled, it only costs an extra call and check.
+    """
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        profile = _profile
+        if profile is None:
+            return fn(*args, **kwargs)
+        record = profile._enter(fn.__name__)
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            profile._exit(record, time.perf_counter() - start)
+
+    return wrapper
+
+
+def propagate(fn: Callable) -> Callable:
+    """Returns the function with its calls and counts nested in the current call.
+
+    Wrap the functions run by a pool of threads, whose calls and counts
+    would be attributed to no call otherwise.
+    """
+    profile = _profile
+    if profile is None:
+        return fn
+    parent = profile._current()
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        with profile._inherit(parent):
+            return fn(*args, **kwargs)
+
+    return wrapper
+
+
+def count(counter: str, value: int = 1) -> None:
+    """Adds to a counter (e.g. rows or bytes read) of the current call, if profiling."""
+    profile = _profile
+    if profile is not None:
+        profile._count(counter, value)
+
+
+@contextlib.contextmanager
+def profiling(trace_memory: bool = False) -> Iterator[Profile]:
+    """Records the instrumented calls made inside the block.
+
+    Example:
+        with profiling() as profile:
+            ...
+        print(profile.summary())
+        # Input of flamegraph.pl or speedscope.
+        profile.write_folded("profile.folded")
+    """
+    global _profile
+    previous = _profile
+    profile = Profile(trace_memory)
+    started_tracing = trace_memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    _profile = profile
+    try:
+        yield profile
+    finally:
+        _profile = previous
+        if started_tracing:
+            tracemalloc.stop()
+
+
+def _profile_process() -> None:
+    """Records all instrumented calls of the process and prints the summary at exit."""
+    global _profile
+    profile = Profile(trace_memory=os.environ.get("LESSONS_PROFILE_MEMORY") == "1")
+    if profile.trace_memory:
+        tracemalloc.start()
+    _profile = profile
+    atexit.register(lambda: print(profile.summary()))
+
+
+# Profile the whole run with LESSONS_PROFILE=1 (and LESSONS_PROFILE_MEMORY=1).
+if os.environ.get("LESSONS_PROFILE") == "1":
+    _profile_process()
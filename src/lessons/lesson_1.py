@@ -1,28 +1,49 @@
 from pathlib import Path
 
-import matplotlib.pyplot as plt
+import numpy as np
 import pandas as pd
 
+from lesson_2 import read_symbol
+from price_store import open_store
+from scanner import read_tail
+
 
 def last_five_rows(symbol: str) -> None:
     """Prints last 5 rows of the given symbol."""
     file_path = Path("data/{}.csv".format(symbol))
-    df = pd.read_csv(file_path)
-    print(df.tail(5))
+    # Only the end of the file is read (see scanner.py).
+    print(read_tail(file_path, 5))
+
+
+def read_field(symbol: str, field: str) -> pd.Series:
+    """Returns a column (e.g. Volume) of the given symbol by ascending date.
+
+    It is a view of the price store's panel (see price_store.py) when the store
+    is built and up to date, otherwise the column is read from the CSV file.
+    """
+    store = open_store()
+    if store is not None and store.is_fresh([symbol]):
+        series = store.get_panel([field], [symbol]).field(field)[symbol]
+        # The store has the dates of all symbols (NaN on the others).
+        series = series.dropna()
+    else:
+        # The files in data/ are sorted newest first.
+        series = read_symbol(symbol, usecols=("Date", field))[field].sort_index()
+    # Both ways give the same ascending float series.
+    return series.astype(np.float64).rename(field).rename_axis("Date")
 
 
 def get_mean_volume(symbol: str) -> float:
     """Returns mean volume of the given symbol."""
-    file_path = Path("data/{}.csv".format(symbol))
-    df = pd.read_csv(file_path)
-    return df["Volume"].mean()
+    return read_field(symbol, "Volume").mean()
 
 
 def plot_high_prices(symbol: str) -> None:
     """Plots high prices of the given symbol."""
-    file_path = Path("data/{}.csv".format(symbol))
-    df = pd.read_csv(file_path)
-    df["High"].plot(title="High Prices")
+    # Imported on first use (see `lesson_2.plot_data`).
+    import matplotlib.pyplot as plt
+
+    read_field(symbol, "High").plot(title="High Prices")
     plt.xlabel("Time")
     plt.ylabel("Price")
     plt.show()
@@ -1,69 +1,193 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Union
 
-import matplotlib.pyplot as plt
+import numpy as np
 import pandas as pd
 
+from compact_prices import CompactPrices
+from csv_index import load_index, read_csv_range
+from frame_cache import CacheInfo, FrameCache
+from instrumentation import count, instrument, propagate
+from price_store import open_store
+from trading_calendar import get_trading_days_between
+
+# Prices as a dataframe or in compact (float32) form.
+Prices = Union[pd.DataFrame, CompactPrices]
+
+# Symbol dataframes read from the CSV files, shared by all calls in the process.
+_frame_cache = FrameCache()
+
+# Rows (first, stop) of the short ranges cached for every symbol dataframe key.
+_cached_ranges: Dict[tuple, List[Tuple[int, int]]] = {}
+
+# Ranges covering less than this fraction of a file are read through its
+# sidecar index (see csv_index.py) instead of parsing the whole file.
+RANGE_READ_FRACTION = 0.5
+
 
 def symbol_to_path(symbol: str) -> Path:
     """Returns CSV file path given ticker symbol."""
     return Path(f"data/{symbol}.csv")
 
 
-def get_stock_prices(
-    symbols: List[str],
-    start_date: str,
-    end_date: str,
+def read_symbol(
+    symbol: str,
+    usecols: Sequence[str] = ("Date", "Adj Close"),
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
 ) -> pd.DataFrame:
-    """Returns a dataframe with stock (adjusted close) prices for the given symbols."""
-    # Define date range.
-    dates = pd.date_range(start_date, end_date)
-
-    # Create an empty dataframe (with dates as indices).
-    df = pd.DataFrame(index=dates)
-
-    # Read SPY data. It would act as a reference stock.
-    df_spy = pd.read_csv(
-        symbol_to_path("SPY"),
-        # use the date as index
-        index_col="Date",
-        # convert the column to datetime
-        parse_dates=True,
-        # we're only interested in these columns
-        usecols=["Date", "Adj Close"],
-    )
-
-    # Rename the "Adj Close" column to "SPY" to avoid clashes during joins.
-    df_spy = df_spy.rename(columns={"Adj Close": "SPY"})
-
-    # Inner join the dataframes.
-    # This operation will remove weekend rows, and
-    # will show only trading days form start to end date.
-    df = df.join(df_spy, how="inner")
-
-    for symbol in symbols:
-        # Skip SPY as we already have it.
-        if symbol == "SPY":
-            continue
-
-        # Read symbol data.
-        df_symbol = pd.read_csv(
-            symbol_to_path(symbol),
+    """Returns the symbol's CSV data (with dates as indices), cached in memory.
+
+    The cache is keyed by the file modification time as well,
+    so an updated CSV file is read again.
+
+    When a start and end date are given, the result contains at least the rows
+    in that range. A short range is sliced from a cached range containing it,
+    or else read on its own, without parsing the whole file, and cached by
+    its rows.
+
+    NOTE: The returned dataframe is shared, do not modify it in place.
+    """
+    path = symbol_to_path(symbol)
+    stat = os.stat(path)
+    key = (symbol, tuple(usecols), stat.st_mtime)
+    if start_date is not None and end_date is not None and key not in _frame_cache:
+        index = load_index(path)
+        first, stop = index.row_range(start_date, end_date)
+        if stop - first < len(index.dates) * RANGE_READ_FRACTION:
+            df = _get_range(key, first, stop)
+            if df is None:
+                df = read_csv_range(path, start_date, end_date, usecols)
+                _frame_cache.put(key + (first, stop), df)
+                _cached_ranges.setdefault(key, []).append((first, stop))
+            return df
+
+    df = _frame_cache.get(key)
+    if df is None:
+        df = pd.read_csv(
+            path,
             # use the date as index
             index_col="Date",
             # convert the column to datetime
             parse_dates=True,
             # we're only interested in these columns
-            usecols=["Date", "Adj Close"],
+            usecols=list(usecols),
         )
+        _frame_cache.put(key, df)
+        count("rows_read", len(df))
+        count("bytes_read", stat.st_size)
+    return df
 
-        # Rename the "Adj Close" column to symbol to avoid clashes during joins.
-        df_symbol = df_symbol.rename(columns={"Adj Close": symbol})
 
-        # Left join the dataframes (because we want to keep all days when SPY traded).
-        df = df.join(df_symbol)
+def _get_range(key: tuple, first: int, stop: int) -> Optional[pd.DataFrame]:
+    """Returns the rows from first to stop of a cached range containing them, if any."""
+    # Forget the evicted ranges.
+    ranges = [
+        rows for rows in _cached_ranges.get(key, []) if key + rows in _frame_cache
+    ]
+    _cached_ranges[key] = ranges
+    for cached_first, cached_stop in ranges:
+        if cached_first <= first and stop <= cached_stop:
+            df = _frame_cache.get(key + (cached_first, cached_stop))
+            if df is not None:
+                return df.iloc[first - cached_first : stop - cached_first]
+    # Not cached, counted as a miss.
+    return _frame_cache.get(key + (first, stop))
 
-    return df
+
+def cache_info() -> CacheInfo:
+    """Returns hit, miss and eviction counters of the symbol dataframe cache."""
+    return _frame_cache.info()
+
+
+def clear_cache() -> None:
+    """Empties the symbol dataframe cache."""
+    _frame_cache.clear()
+    _cached_ranges.clear()
+
+
+def _read_adj_close(
+    symbol: str, dates: pd.DatetimeIndex, start_date: str, end_date: str
+) -> np.ndarray:
+    """Returns the symbol's adjusted close prices aligned to the dates (missing are NaN)."""
+    df_symbol = read_symbol(symbol, start_date=start_date, end_date=end_date)
+    return df_symbol["Adj Close"].reindex(dates).to_numpy(dtype=np.float64)
+
+
+def _read_columns(
+    symbols: List[str],
+    dates: pd.DatetimeIndex,
+    start_date: str,
+    end_date: str,
+    max_workers: Optional[int],
+) -> Iterator[np.ndarray]:
+    """Yields the adjusted close prices of the symbols in order, read concurrently."""
+    if max_workers == 1 or len(symbols) <= 1:
+        for symbol in symbols:
+            yield _read_adj_close(symbol, dates, start_date, end_date)
+    else:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            yield from executor.map(
+                propagate(
+                    lambda symbol: _read_adj_close(symbol, dates, start_date, end_date)
+                ),
+                symbols,
+            )
+
+
+@instrument
+def get_stock_prices(
+    symbols: List[str],
+    start_date: str,
+    end_date: str,
+    max_workers: Optional[int] = None,
+) -> pd.DataFrame:
+    """Returns a dataframe with stock (adjusted close) prices for the given symbols.
+
+    The CSV files are read by a pool of `max_workers` threads.
+    """
+    # Use the binary store (see price_store.py) when it is built and up to date.
+    store = open_store()
+    if store is not None and store.is_fresh(["SPY"] + symbols):
+        return store.get_stock_prices(symbols, start_date, end_date)
+
+    # Keep only the days when SPY (the reference stock) traded, from start to end date.
+    dates = get_trading_days_between(start_date, end_date)
+    # SPY comes first, once.
+    names = ["SPY"] + [symbol for symbol in symbols if symbol != "SPY"]
+
+    # Read the symbols concurrently, then build the dataframe at once
+    # instead of joining the symbols one by one.
+    columns = list(_read_columns(names, dates, start_date, end_date, max_workers))
+    return pd.DataFrame(np.column_stack(columns), index=dates, columns=names)
+
+
+@instrument
+def get_compact_prices(
+    symbols: List[str],
+    start_date: str,
+    end_date: str,
+    max_workers: Optional[int] = None,
+) -> CompactPrices:
+    """Returns the same prices as `get_stock_prices` in float32 (see compact_prices.py).
+
+    The prices are written straight into one (dates x symbols) float32 array,
+    so the float64 prices of all symbols are never held at once.
+    """
+    dates = get_trading_days_between(start_date, end_date)
+    names = ["SPY"] + [symbol for symbol in symbols if symbol != "SPY"]
+
+    store = open_store()
+    if store is not None and store.is_fresh(names):
+        values = store.get_values(names, dates, dtype=np.float32)
+    else:
+        values = np.empty((len(dates), len(names)), dtype=np.float32)
+        columns = _read_columns(names, dates, start_date, end_date, max_workers)
+        for i, column in enumerate(columns):
+            values[:, i] = column
+    return CompactPrices(values, dates, names)
 
 
 def plot_data(
@@ -73,6 +197,9 @@ def plot_data(
     ylabel: str = "Price",
 ) -> None:
     """Plots the dataframe."""
+    # Imported on first use, so that the computations do not load matplotlib.
+    import matplotlib.pyplot as plt
+
     axis = df.plot(title=title)
     axis.set_xlabel(xlabel)
     axis.set_ylabel(ylabel)
@@ -87,8 +214,10 @@ def plot_selected(
     plot_data(df.loc[start_date:end_date, symbols])
 
 
-def normalize_prices(df: pd.DataFrame) -> pd.DataFrame:
+def normalize_prices(df: Prices) -> Prices:
     """Normalizes stock prices using the first row of the dataframe."""
+    if isinstance(df, CompactPrices):
+        return df.normalized()
     return df / df.iloc[0]
 
 
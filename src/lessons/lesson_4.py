@@ -1,9 +1,10 @@
 from typing import Tuple
 
-import matplotlib.pyplot as plt
 import pandas as pd
 
-from lesson_2 import get_stock_prices, plot_data
+from compact_prices import CompactPrices
+from instrumentation import instrument
+from lesson_2 import Prices, get_stock_prices, plot_data
 
 
 def get_rolling_mean(values: pd.Series, window: int) -> pd.Series:
@@ -16,14 +17,17 @@ def get_rolling_std(values: pd.Series, window: int) -> pd.Series:
     return values.rolling(window=window).std()
 
 
-def get_bollinger_bands(rm: pd.Series, rstd: pd.Series) -> Tuple[pd.Series, pd.Series]:
-    """Returns upper and lower Bollinger Bands."""
-    upper_band = rm + rstd * 2
-    lower_band = rm - rstd * 2
+def get_bollinger_bands(
+    rm: pd.Series, rstd: pd.Series, num_std: float = 2
+) -> Tuple[pd.Series, pd.Series]:
+    """Returns upper and lower Bollinger Bands, num_std rolling stds from the mean."""
+    upper_band = rm + rstd * num_std
+    lower_band = rm - rstd * num_std
     return upper_band, lower_band
 
 
-def compute_daily_returns(df: pd.DataFrame) -> pd.DataFrame:
+@instrument
+def compute_daily_returns(df: Prices) -> Prices:
     """Returns the daily return values.
 
     Let's say the price today is $110, and yesterday it was $100.
@@ -32,21 +36,29 @@ def compute_daily_returns(df: pd.DataFrame) -> pd.DataFrame:
 
     NOTE: As the first day values will not have previous values,
     they will become NaN. We then replace them with 0.
+
+    Compact prices (see compact_prices.py) give compact (float32) returns.
     """
+    if isinstance(df, CompactPrices):
+        return df.daily_returns()
     return (df / df.shift(1) - 1).fillna(0)
 
 
-def compute_cumulative_returns(df: pd.DataFrame) -> pd.DataFrame:
+def compute_cumulative_returns(df: Prices) -> Prices:
     """Returns the cumulative return values.
 
     Let's say the price today is $110, and on the first day it was $100.
     Then the cumulative return is (110 - 100) / 100 = 110 / 100 - 1 = 0.1 = 10%
     Thus, for day d the formula is: prices[d] / prices[0] - 1
     """
+    if isinstance(df, CompactPrices):
+        return df.cumulative_returns()
     return df / df.iloc[0] - 1
 
 
 if __name__ == "__main__":
+    import matplotlib.pyplot as plt
+
     print("Plotting stock prices for SPY, XOM, GOOG, and GLD from 2010 to 2012...")
     df = get_stock_prices(["SPY", "XOM", "GOOG", "GLD"], "2010-01-01", "2012-12-31")
     plot_data(df)
@@ -3,18 +3,29 @@ from typing import List
 
 import pandas as pd
 
-from lesson_2 import get_stock_prices, normalize_prices
+from instrumentation import instrument
+from lesson_2 import get_compact_prices, get_stock_prices, normalize_prices
 from lesson_4 import compute_daily_returns
 
 
+@instrument
 def compute_portfolio_value(
     budget: float,
     symbols: List[str],
     allocations: List[float],
     start_date: str,
     end_date: str,
+    compact: bool = False,
 ) -> pd.Series:
-    """Computes the value of a portfolio."""
+    """Computes the value of a portfolio.
+
+    With `compact`, the prices are loaded and normalized in float32
+    (see compact_prices.py for the accuracy bound).
+    """
+    if compact:
+        prices = get_compact_prices(symbols, start_date, end_date)
+        return prices.portfolio_value(allocations, budget)
+
     prices = get_stock_prices(symbols, start_date, end_date)
     normalized = normalize_prices(prices)
     allocated = normalized * allocations
@@ -48,6 +59,7 @@ def compute_portfolio_risk(portfolio_daily_returns: pd.Series) -> float:
     return portfolio_daily_returns.std()
 
 
+@instrument
 def compute_sharpe_ratio(
     portfolio_daily_returns: pd.Series, risk_free_rate: float = 0.01
 ) -> float:
@@ -1,6 +1,5 @@
 from typing import Callable
 
-import matplotlib.pyplot as plt
 import numpy as np
 import scipy.optimize as spo
 
@@ -17,7 +16,13 @@ def error_line(line: np.ndarray, data: np.ndarray) -> float:
 
 
 def fit_line(data: np.ndarray, error_fn: Callable) -> np.ndarray:
-    """Fits a line to the given data, minimizing the error."""
+    """Fits a line to the given data, minimizing the error.
+
+    NOTE: It draws the initial guess. See curve_fitting.py to fit without plotting.
+    """
+    # Imported on first use (see `lesson_2.plot_data`).
+    import matplotlib.pyplot as plt
+
     # Generate initial guess (x = 0, y = mean of ys)
     line_guess = np.array([0, np.mean(data[:, 1])])
     print("line guess", line_guess)
@@ -41,7 +46,12 @@ def error_poly(coeffs: np.ndarray, data: np.ndarray) -> float:
 
 
 def fit_poly(data: np.ndarray, error_fn: Callable, degree=3) -> np.poly1d:
-    """Fits a polynomial to the given data, minimizing the error."""
+    """Fits a polynomial to the given data, minimizing the error.
+
+    NOTE: It draws the initial guess. See curve_fitting.py to fit without plotting.
+    """
+    import matplotlib.pyplot as plt
+
     # Generate initial guess (coeffs = [1, 1, 1, ...])
     poly_guess = np.poly1d(np.ones(degree + 1, dtype=np.float32))
     x_guess = np.linspace(-100, 100, 50)
@@ -57,6 +67,8 @@ def fit_poly(data: np.ndarray, error_fn: Callable, degree=3) -> np.poly1d:
 
 
 if __name__ == "__main__":
+    import matplotlib.pyplot as plt
+
     x_guess = 2.0
     minimum = spo.minimize(f, x_guess, method="SLSQP", options={"disp": True})
     print("Minima found at x = ", minimum.x, ", f(x) = ", minimum.fun)
@@ -0,0 +1,150 @@
+import math
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, NamedTuple, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+
+class SimulationResults(NamedTuple):
+    """Outcomes of M simulated portfolio paths (one element per path)."""
+
+    cumulative_return: np.ndarray
+    sharpe_ratio: np.ndarray
+    # Largest fall from a previous peak, as a (positive) fraction of the peak.
+    max_drawdown: np.ndarray
+
+
+# Returns matrix and allocations of the current worker process (see `_init_worker`).
+_worker_inputs: Optional[Tuple[np.ndarray, np.ndarray]] = None
+
+
+def _init_worker(returns: np.ndarray, allocations: np.ndarray) -> None:
+    """Receives the inputs once per worker process instead of once per batch."""
+    global _worker_inputs
+    _worker_inputs = (returns, allocations)
+
+
+def _sample_rows(
+    rng: np.random.Generator, n_returns: int, n_paths: int, n_days: int, block_size: int
+) -> np.ndarray:
+    """Returns (n_paths x n_days) rows of the returns matrix, drawn in blocks of days."""
+    n_blocks = -(-n_days // block_size)
+    starts = rng.integers(0, n_returns - block_size + 1, size=(n_paths, n_blocks))
+    rows = starts[:, :, None] + np.arange(block_size)
+    return rows.reshape(n_paths, -1)[:, :n_days]
+
+
+def _simulate_batch(
+    seed: np.random.SeedSequence,
+    n_paths: int,
+    n_days: int,
+    block_size: int,
+    risk_free_rate: float,
+) -> SimulationResults:
+    """Simulates one batch of paths with its own random stream."""
+    returns, allocations = _worker_inputs
+    rows = _sample_rows(
+        np.random.default_rng(seed), len(returns), n_paths, n_days, block_size
+    )
+
+    # Buy and hold, as `lesson_7.compute_portfolio_value`: every position grows
+    # with its symbol's price. A day costs O(paths x symbols) memory at most.
+    growth = np.ones((n_paths, returns.shape[1]))
+    values = np.empty((n_paths, n_days + 1))
+    values[:, 0] = allocations.sum()
+    for day in range(n_days):
+        growth *= 1 + returns[rows[:, day]]
+        values[:, day + 1] = growth @ allocations
+
+    daily_returns = values[:, 1:] / values[:, :-1] - 1
+    average_daily_return = daily_returns.mean(axis=1)
+    risk = daily_returns.std(axis=1, ddof=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sharpe_ratio = math.sqrt(252) * (average_daily_return - risk_free_rate) / risk
+    peaks = np.maximum.accumulate(values, axis=1)
+    return SimulationResults(
+        cumulative_return=values[:, -1] / values[:, 0] - 1,
+        sharpe_ratio=sharpe_ratio,
+        max_drawdown=(1 - values / peaks).max(axis=1),
+    )
+
+
+def simulate_portfolio(
+    daily_returns: Union[pd.DataFrame, np.ndarray],
+    allocations: List[float],
+    n_paths: int = 10_000,
+    n_days: Optional[int] = None,
+    block_size: int = 1,
+    seed: Optional[int] = None,
+    risk_free_rate: float = 0.01,
+    batch_size: int = 1_000,
+    max_workers: Optional[int] = None,
+) -> SimulationResults:
+    """Simulates the portfolio over paths of resampled historical daily returns.
+
+    Every path draws `n_days` (by default, as many as given) days of returns
+    of all symbols at once, in blocks of `block_size` consecutive days (1 is
+    the plain bootstrap, longer blocks keep some of the autocorrelation).
+    The metrics are those of lesson_7 (the Sharpe ratio uses its daily
+    risk free rate).
+
+    The paths are simulated in batches of `batch_size` by a pool of
+    `max_workers` processes (in this process when it is 1). Each batch has its
+    own random stream spawned from `seed`, so the results only depend on the
+    seed (and `batch_size`), not on the number of workers.
+
+    NOTE: Missing returns are treated as 0 (as `lesson_4.compute_daily_returns` does).
+    """
+    returns = np.nan_to_num(np.asarray(daily_returns, dtype=np.float64))
+    allocations = np.asarray(allocations, dtype=np.float64)
+    n_days = len(returns) if n_days is None else n_days
+    if n_paths < 1:
+        raise ValueError("n_paths must be at least 1")
+    # The risk (and so the Sharpe ratio) needs at least 2 daily returns.
+    if n_days < 2:
+        raise ValueError("n_days must be at least 2")
+    if batch_size < 1:
+        raise ValueError("batch_size must be at least 1")
+    if not 1 <= block_size <= len(returns):
+        raise ValueError(f"block_size must be between 1 and {len(returns)}")
+
+    batch_sizes = [
+        min(batch_size, n_paths - start) for start in range(0, n_paths, batch_size)
+    ]
+    seeds = np.random.SeedSequence(seed).spawn(len(batch_sizes))
+    batches = [
+        (batch_seed, size, n_days, block_size, risk_free_rate)
+        for batch_seed, size in zip(seeds, batch_sizes)
+    ]
+
+    if max_workers == 1 or len(batches) <= 1:
+        _init_worker(returns, allocations)
+        results = [_simulate_batch(*batch) for batch in batches]
+    else:
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=_init_worker,
+            initargs=(returns, allocations),
+        ) as executor:
+            results = list(executor.map(_simulate_batch, *zip(*batches)))
+
+    return SimulationResults(*(np.concatenate(metric) for metric in zip(*results)))
+
+
+if __name__ == "__main__":
+    from lesson_2 import get_stock_prices
+    from lesson_4 import compute_daily_returns
+
+    symbols = ["SPY", "XOM", "GOOG", "GLD"]
+    allocations = [0.4, 0.4, 0.1, 0.1]
+    prices = get_stock_prices(symbols, "2009-01-01", "2011-12-31")
+    # Drop the first day (its return is 0 by construction).
+    daily_returns = compute_daily_returns(prices)[1:]
+
+    results = simulate_portfolio(
+        daily_returns, allocations, n_paths=10_000, n_days=252, block_size=5, seed=0
+    )
+    print("Percentiles of one year outcomes (5%, 50%, 95%)")
+    for name, values in results._asdict().items():
+        print(f"{name}:", np.percentile(values, [5, 50, 95]).round(4))
@@ -0,0 +1,256 @@
+import itertools
+import json
+import math
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from multiprocessing import shared_memory
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from lesson_4 import get_bollinger_bands, get_rolling_mean, get_rolling_std
+
+Params = Dict[str, Any]
+# Returns the metrics of one parameter combination given the (T x N) prices.
+Objective = Callable[..., Dict[str, float]]
+
+# Prices of the current worker process, a view of the shared memory block.
+_worker_prices: Optional[np.ndarray] = None
+_worker_memory: Optional[shared_memory.SharedMemory] = None
+
+
+def grid(**values: Sequence) -> List[Params]:
+    """Returns every combination of the parameter values.
+
+    Example:
+        grid(window=[10, 20], num_std=[1.5, 2]) ->
+        [{"window": 10, "num_std": 1.5}, {"window": 10, "num_std": 2}, ...]
+    """
+    names = list(values)
+    return [
+        dict(zip(names, combination))
+        for combination in itertools.product(*values.values())
+    ]
+
+
+def random_grid(n: int, seed: Optional[int] = None, **values: Sequence) -> List[Params]:
+    """Returns n different combinations of the parameter values, drawn at random."""
+    sizes = [len(options) for options in values.values()]
+    total = math.prod(sizes)
+    rng = np.random.default_rng(seed)
+    picks = rng.choice(total, size=min(n, total), replace=False)
+    return [
+        {
+            name: options[i]
+            for (name, options), i in zip(values.items(), np.unravel_index(pick, sizes))
+        }
+        for pick in picks
+    ]
+
+
+def _params_key(params: Params) -> str:
+    return json.dumps(params, sort_keys=True)
+
+
+def _to_builtin(value: Any) -> Any:
+    """Converts numpy scalars (e.g. picked by `random_grid`) for JSON."""
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def _read_results(results_path: Optional[Path]) -> List[Dict[str, Params]]:
+    """Returns the results saved by previous runs (none without a path)."""
+    if results_path is None or not results_path.exists():
+        return []
+    with open(results_path) as f:
+        return [json.loads(line) for line in f]
+
+
+def _init_worker(name: str, shape: Tuple[int, ...], dtype: str) -> None:
+    """Attaches the worker to the shared prices (without copying them)."""
+    global _worker_prices, _worker_memory
+    _worker_memory = shared_memory.SharedMemory(name=name)
+    _worker_prices = np.ndarray(shape, dtype=dtype, buffer=_worker_memory.buf)
+    _worker_prices.flags.writeable = False
+
+
+def _evaluate(objective: Objective, params: Params) -> Dict[str, float]:
+    return objective(_worker_prices, **params)
+
+
+def iter_search(
+    objective: Objective,
+    prices: pd.DataFrame,
+    candidates: List[Params],
+    rank_by: str = "sharpe_ratio",
+    results_path: Optional[Path] = None,
+    patience: Optional[int] = None,
+    max_workers: Optional[int] = None,
+) -> Iterator[Tuple[Params, Dict[str, float]]]:
+    """Evaluates the objective for every candidate, yielding (params, metrics) as they complete.
+
+    The prices are copied once into a shared memory block, that the pool of
+    `max_workers` processes (this process when it is 1) reads without copies.
+    The objective must be a module level function (so that it can be sent to
+    the workers) called as objective(prices, **params), where prices is the
+    read-only (T x N) array of the prices' columns.
+
+    Every result is appended to `results_path` (JSON lines) as soon as it
+    completes. Candidates already in that file are skipped, so an interrupted
+    search resumes where it stopped.
+
+    With `patience`, the search stops early once that many results in a row
+    did not improve the best `rank_by` metric (higher is better). Results
+    complete in any order with several workers, so where it stops may vary.
+    """
+    done = set()
+    best = -math.inf
+    for result in _read_results(results_path):
+        done.add(_params_key(result["params"]))
+        best = max(best, result["metrics"][rank_by])
+    pending = [
+        {name: _to_builtin(value) for name, value in params.items()}
+        for params in candidates
+    ]
+    pending = [params for params in pending if _params_key(params) not in done]
+    if not pending:
+        return
+
+    values = prices.to_numpy(dtype=np.float64)
+    memory = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+    shared = np.ndarray(values.shape, dtype=values.dtype, buffer=memory.buf)
+    shared[:] = values
+    shared.flags.writeable = False
+    del values
+    results_file = open(results_path, "a") if results_path is not None else None
+    try:
+        worker_args = (memory.name, shared.shape, shared.dtype.str)
+        since_best = 0
+
+        def record(params: Params, metrics: Dict[str, float]) -> bool:
+            """Saves the result and returns whether to stop early."""
+            nonlocal best, since_best
+            if results_file is not None:
+                results_file.write(json.dumps({"params": params, "metrics": metrics}))
+                results_file.write("\n")
+                results_file.flush()
+            if metrics[rank_by] > best:
+                best, since_best = metrics[rank_by], 0
+            else:
+                since_best += 1
+            return patience is not None and since_best >= patience
+
+        if max_workers == 1:
+            for params in pending:
+                metrics = objective(shared, **params)
+                stop = record(params, metrics)
+                yield params, metrics
+                if stop:
+                    break
+            return
+
+        with ProcessPoolExecutor(
+            max_workers=max_workers, initializer=_init_worker, initargs=worker_args
+        ) as executor:
+            futures = {
+                executor.submit(_evaluate, objective, params): params
+                for params in pending
+            }
+            try:
+                while futures:
+                    completed, _ = wait(futures, return_when=FIRST_COMPLETED)
+                    stop = False
+                    for future in completed:
+                        params = futures.pop(future)
+                        metrics = future.result()
+                        stop = record(params, metrics) or stop
+                        yield params, metrics
+                    if stop:
+                        break
+            finally:
+                for future in futures:
+                    future.cancel()
+    finally:
+        if results_file is not None:
+            results_file.close()
+        # The view must be released before the block is closed.
+        del shared
+        memory.close()
+        memory.unlink()
+
+
+def search(
+    objective: Objective,
+    prices: pd.DataFrame,
+    candidates: List[Params],
+    rank_by: str = "sharpe_ratio",
+    results_path: Optional[Path] = None,
+    patience: Optional[int] = None,
+    max_workers: Optional[int] = None,
+) -> pd.DataFrame:
+    """Runs `iter_search` and returns all results ranked by `rank_by` (best first).
+
+    The table includes the results of previous runs saved in `results_path`.
+    """
+    results = _read_results(results_path)
+    for params, metrics in iter_search(
+        objective, prices, candidates, rank_by, results_path, patience, max_workers
+    ):
+        results.append({"params": params, "metrics": metrics})
+    return ranked(results, rank_by)
+
+
+def ranked(results: List[Dict[str, Params]], rank_by: str) -> pd.DataFrame:
+    """Returns a table of the {"params", "metrics"} results, best first."""
+    rows = [{**result["params"], **result["metrics"]} for result in results]
+    table = pd.DataFrame(rows)
+    if table.empty:
+        return table
+    return table.sort_values(rank_by, ascending=False, kind="stable", ignore_index=True)
+
+
+def bollinger_strategy(
+    prices: np.ndarray, window: int, num_std: float, column: int = 0
+) -> Dict[str, float]:
+    """Metrics of a mean reversion strategy on one symbol's prices.
+
+    The symbol is bought when its price falls below the lower Bollinger Band
+    and sold when it rises above the upper band. Positions are taken at the
+    next day's price, so that the strategy does not peek into the future.
+    """
+    price = pd.Series(prices[:, column])
+    rm = get_rolling_mean(price, window)
+    rstd = get_rolling_std(price, window)
+    upper_band, lower_band = get_bollinger_bands(rm, rstd, num_std)
+    position = pd.Series(
+        np.where(price < lower_band, 1.0, np.where(price > upper_band, 0.0, np.nan))
+    )
+    position = position.ffill().fillna(0).shift(1).fillna(0)
+
+    daily_returns = (price / price.shift(1) - 1).fillna(0) * position
+    daily_returns = daily_returns[1:]
+    risk = daily_returns.std()
+    return {
+        "cumulative_return": float((1 + daily_returns).prod() - 1),
+        # Annualized, without risk free rate (see `lesson_7.compute_sharpe_ratio`).
+        "sharpe_ratio": float(math.sqrt(252) * daily_returns.mean() / risk)
+        if risk > 0
+        else 0.0,
+        "trades": int((position.diff().abs() > 0).sum()),
+    }
+
+
+if __name__ == "__main__":
+    from lesson_2 import get_stock_prices
+
+    prices = get_stock_prices(["SPY"], "2002-01-01", "2011-12-31")
+    candidates = grid(window=range(5, 105, 5), num_std=[1, 1.5, 2, 2.5, 3])
+
+    print("Bollinger Band strategies on SPY, best first")
+    print(search(bollinger_strategy, prices, candidates).head(10))
+
+    print("Random search with early stopping")
+    candidates = random_grid(
+        40, seed=0, window=range(5, 105), num_std=np.arange(1, 3.05, 0.1).round(1)
+    )
+    print(search(bollinger_strategy, prices, candidates, patience=10).head(5))
@@ -0,0 +1,70 @@
+import math
+from typing import NamedTuple, Union
+
+import numpy as np
+import pandas as pd
+
+
+class PortfolioStats(NamedTuple):
+    """Values and metrics of K portfolios (one row/element per portfolio)."""
+
+    # (K x T) daily portfolio values.
+    values: np.ndarray
+    cumulative_return: np.ndarray
+    average_daily_return: np.ndarray
+    risk: np.ndarray
+    sharpe_ratio: np.ndarray
+
+
+def evaluate_portfolios(
+    prices: Union[pd.DataFrame, np.ndarray],
+    allocations: np.ndarray,
+    budget: float = 1.0,
+    risk_free_rate: float = 0.01,
+) -> PortfolioStats:
+    """Evaluates many portfolios over the same (T x N) prices at once.
+
+    Every row of the (K x N) allocations matrix is one portfolio. The results
+    are the same as calling `lesson_7.compute_portfolio_value` and the
+    `compute_portfolio_*`/`compute_sharpe_ratio` functions for each row,
+    but computed with a handful of matrix operations.
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    allocations = np.atleast_2d(np.asarray(allocations, dtype=np.float64))
+
+    # Normalize prices using the first row. Missing prices add nothing
+    # to the portfolio value (the same as pandas' sum skipping NaNs).
+    normalized = np.nan_to_num(prices / prices[0])
+
+    # (K x N) @ (N x T): position values summed over the symbols.
+    values = budget * (allocations @ normalized.T)
+
+    # Daily returns without the first day (see `compute_portfolio_daily_returns`).
+    daily_returns = values[:, 1:] / values[:, :-1] - 1
+
+    average_daily_return = daily_returns.mean(axis=1)
+    risk = daily_returns.std(axis=1, ddof=1)
+    return PortfolioStats(
+        values=values,
+        cumulative_return=values[:, -1] / values[:, 0] - 1,
+        average_daily_return=average_daily_return,
+        risk=risk,
+        sharpe_ratio=math.sqrt(252) * (average_daily_return - risk_free_rate) / risk,
+    )
+
+
+if __name__ == "__main__":
+    from lesson_2 import get_stock_prices
+
+    symbols = ["SPY", "XOM", "GOOG", "GLD"]
+    prices = get_stock_prices(symbols, "2009-01-01", "2011-12-31")
+
+    # Screen random allocations, each one summing to 1.
+    rng = np.random.default_rng(0)
+    allocations = rng.dirichlet(np.ones(len(symbols)), size=10_000)
+    stats = evaluate_portfolios(prices, allocations, budget=1_000_000)
+
+    best = np.argmax(stats.sharpe_ratio)
+    print("Best allocations:", dict(zip(symbols, allocations[best].round(3))))
+    print("Cumulative return:", stats.cumulative_return[best])
+    print("Sharpe ratio:", stats.sharpe_ratio[best])
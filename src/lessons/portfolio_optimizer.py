@@ -0,0 +1,165 @@
+import math
+from typing import NamedTuple, Optional, Union
+
+import numpy as np
+import pandas as pd
+import scipy.linalg as spl
+import scipy.optimize as spo
+
+# Sharpe ratio is annualized with k = sqrt(252) (see `lesson_7.compute_sharpe_ratio`).
+K = math.sqrt(252)
+
+# Risk free rate of about 1% per year (see `lesson_7.compute_sharpe_ratio`),
+# as a daily rate since it is subtracted from daily returns.
+RISK_FREE_RATE = 0.01 / 252
+
+
+class ReturnMoments(NamedTuple):
+    """Mean and covariance of the daily returns of N symbols."""
+
+    mean: np.ndarray
+    cov: np.ndarray
+
+
+def compute_return_moments(
+    daily_returns: Union[pd.DataFrame, np.ndarray]
+) -> ReturnMoments:
+    """Returns the mean and covariance of the (T x N) daily returns.
+
+    NOTE: `lesson_4.compute_daily_returns` sets the first row to 0,
+    drop it before calling this function.
+    """
+    returns = np.asarray(daily_returns, dtype=np.float64)
+    return ReturnMoments(returns.mean(axis=0), np.cov(returns, rowvar=False, ddof=1))
+
+
+def sharpe_ratio(
+    allocations: np.ndarray,
+    moments: ReturnMoments,
+    risk_free_rate: float = RISK_FREE_RATE,
+) -> float:
+    """Returns the Sharpe ratio of a portfolio rebalanced daily to the allocations.
+
+    The portfolio daily return is allocations • daily returns, so its average is
+    allocations • mean and its risk is sqrt(allocations^T • cov • allocations).
+    It is `lesson_7.compute_sharpe_ratio` of those daily returns, given the
+    same risk free rate (a buy and hold portfolio, as
+    `lesson_7.compute_portfolio_value`, drifts away from the allocations instead).
+
+    NOTE: The default rate is 1% per year. lesson_7's default, 0.01, is
+    subtracted from the daily returns as is: it is 1% per day.
+    """
+    average_daily_return = allocations @ moments.mean
+    risk = math.sqrt(allocations @ moments.cov @ allocations)
+    return K * (average_daily_return - risk_free_rate) / risk
+
+
+def _solve_nnls(moments: ReturnMoments, excess: np.ndarray) -> np.ndarray:
+    """Returns y >= 0 minimizing 1/2 y^T • cov • y - excess • y.
+
+    With cov = L • L^T this is the non-negative least squares problem
+    min ||L^T • y - L^-1 • excess||^2.
+    """
+    cov = moments.cov
+    try:
+        lower = np.linalg.cholesky(cov)
+    except np.linalg.LinAlgError:
+        # Fewer days than symbols (or duplicated symbols) make cov singular.
+        ridge = 1e-10 * np.trace(cov) / len(cov)
+        lower = np.linalg.cholesky(cov + ridge * np.eye(len(cov)))
+    target = spl.solve_triangular(lower, excess, lower=True)
+    y, _ = spo.nnls(lower.T, target)
+    return y
+
+
+def _solve_on_support(
+    moments: ReturnMoments, excess: np.ndarray, support: np.ndarray
+) -> Optional[np.ndarray]:
+    """Returns the solution of the same problem as `_solve_nnls` if `support` is
+    exactly its set of positive entries, otherwise None.
+    """
+    cov = moments.cov
+    y = np.zeros(len(excess))
+    try:
+        y[support] = np.linalg.solve(cov[np.ix_(support, support)], excess[support])
+    except np.linalg.LinAlgError:
+        return None
+    if not np.all(y[support] > 0):
+        return None
+    # Optimality: increasing any allocation outside the support must not help.
+    gradient = cov @ y - excess
+    if np.any(gradient[~support] < -1e-12 * np.abs(excess).max()):
+        return None
+    return y
+
+
+def optimize_allocations(
+    moments: ReturnMoments,
+    initial: Optional[np.ndarray] = None,
+    risk_free_rate: float = RISK_FREE_RATE,
+) -> np.ndarray:
+    """Returns the allocations (each in [0, 1], summing to 1) maximizing the Sharpe ratio.
+
+    The maximum is found exactly: if y >= 0 minimizes
+    1/2 y^T • cov • y - (mean - risk_free_rate) • y, then y / sum(y) maximizes
+    the Sharpe ratio. It needs some symbol to return more than the risk free
+    rate on average: otherwise every portfolio has a negative Sharpe ratio
+    (the highest is the riskiest one), and a ValueError is raised.
+
+    Pass the previous solution as `initial` to warm start the search:
+    if the same symbols are still held, the new allocations are found
+    by solving a linear system over them only.
+    """
+    excess = moments.mean - risk_free_rate
+    if not np.any(excess > 0):
+        raise ValueError("No symbol returns more than the risk free rate")
+    allocations = None
+    if initial is not None and np.all(np.isfinite(initial)):
+        allocations = _solve_on_support(moments, excess, initial > 0)
+    if allocations is None:
+        allocations = _solve_nnls(moments, excess)
+    return allocations / allocations.sum()
+
+
+def optimize_rolling(
+    daily_returns: pd.DataFrame,
+    window: int,
+    step: int = 1,
+    risk_free_rate: float = RISK_FREE_RATE,
+) -> pd.DataFrame:
+    """Returns the optimal allocations over a rolling window of daily returns.
+
+    Every `step` days, the allocations are optimized over the last `window`
+    days, starting from the previous allocations. They are NaN for the windows
+    when no symbol returns more than the risk free rate.
+    """
+    returns = daily_returns.to_numpy(dtype=np.float64)
+    dates = []
+    rows = []
+    allocations = None
+    for end in range(window, len(returns) + 1, step):
+        moments = compute_return_moments(returns[end - window : end])
+        try:
+            allocations = optimize_allocations(moments, allocations, risk_free_rate)
+        except ValueError:
+            allocations = np.full(returns.shape[1], np.nan)
+        dates.append(daily_returns.index[end - 1])
+        rows.append(allocations)
+    return pd.DataFrame(rows, index=dates, columns=daily_returns.columns)
+
+
+if __name__ == "__main__":
+    from lesson_2 import get_stock_prices
+    from lesson_4 import compute_daily_returns
+
+    symbols = ["SPY", "XOM", "GOOG", "GLD", "IBM", "AAPL"]
+    prices = get_stock_prices(symbols, "2009-01-01", "2011-12-31")
+    daily_returns = compute_daily_returns(prices)[1:]
+
+    moments = compute_return_moments(daily_returns)
+    allocations = optimize_allocations(moments)
+    print("Optimal allocations:", dict(zip(prices.columns, allocations.round(3))))
+    print("Sharpe ratio:", sharpe_ratio(allocations, moments))
+
+    print("Optimal allocations over a rolling 1-year window, every quarter")
+    print(optimize_rolling(daily_returns, window=252, step=63).round(3))
@@ -0,0 +1,171 @@
+import asyncio
+import http.client
+import json
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from price_store import DATA_DIR, STORE_DIR, PriceStore, build_store, open_store
+
+# The service only listens on the loopback interface.
+HOST = "127.0.0.1"
+PORT = 8765
+
+# Longest request line or header accepted (a query can list every symbol).
+MAX_LINE = 2**20
+
+
+class PriceService:
+    """Answers `get_stock_prices` queries from the whole store, kept in memory.
+
+    Requests are HTTP GETs of /prices?symbols=IBM,GOOG&start=...&end=...
+    (and optionally &field=Close). The response body is the raw int64 dates
+    (nanoseconds since epoch) followed by the raw (dates x symbols) float64
+    prices, both little-endian and C-ordered. The symbols (SPY first, as
+    `lesson_2.get_stock_prices` returns them) are listed in the X-Symbols
+    header, the number of dates in X-Rows.
+
+    The CSV files are read once, restart the service to pick up updates.
+    """
+
+    def __init__(self, store_dir: Path = STORE_DIR, data_dir: Path = DATA_DIR):
+        symbols = sorted(path.stem for path in data_dir.glob("*.csv"))
+        store = open_store(store_dir)
+        if store is None or not store.is_fresh(symbols, data_dir):
+            build_store(data_dir, store_dir)
+        # Loaded once: every query is answered from memory.
+        self.store = PriceStore(store_dir, in_memory=True)
+
+    def query(
+        self, symbols: List[str], start_date: str, end_date: str, field: str
+    ) -> Tuple[pd.DatetimeIndex, np.ndarray, List[str]]:
+        prices = self.store.get_stock_prices(symbols, start_date, end_date, field)
+        return prices.index, prices.to_numpy(), list(prices.columns)
+
+    async def handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """Serves the requests of one (keep-alive) connection."""
+        try:
+            while True:
+                try:
+                    request_line = await reader.readline()
+                    if not request_line:
+                        break
+                    while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                        pass
+                except ValueError:
+                    # readline raises it for lines longer than MAX_LINE, the
+                    # rest of the request cannot be read.
+                    self._write(writer, "400 Bad Request", {}, b"Line too long")
+                    await writer.drain()
+                    break
+                self._write(writer, *await self._respond(request_line))
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    def _write(
+        writer: asyncio.StreamWriter, status: str, headers: Dict[str, str], body: bytes
+    ) -> None:
+        writer.write(
+            f"HTTP/1.1 {status}\r\n".encode()
+            + "".join(f"{k}: {v}\r\n" for k, v in headers.items()).encode()
+            + f"Content-Length: {len(body)}\r\n\r\n".encode()
+        )
+        writer.write(body)
+
+    async def _respond(self, request_line: bytes) -> Tuple[str, Dict[str, str], bytes]:
+        try:
+            method, target, _ = request_line.decode("ascii").split()
+            url = urlsplit(target)
+            if method != "GET" or url.path != "/prices":
+                return "404 Not Found", {}, b"Only GET /prices is served"
+            params = {key: values[0] for key, values in parse_qs(url.query).items()}
+            symbols = params.get("symbols", "")
+            symbols = symbols.split(",") if symbols else []
+            field = params.get("field", "Adj Close")
+            missing = [name for name in ["SPY"] + symbols if name not in self.store]
+            if missing:
+                return "404 Not Found", {}, f"Unknown symbols: {missing}".encode()
+            if field not in self.store.fields:
+                return "404 Not Found", {}, f"Unknown field: {field!r}".encode()
+            start_date = pd.Timestamp(params["start"]).strftime("%Y-%m-%d")
+            end_date = pd.Timestamp(params["end"]).strftime("%Y-%m-%d")
+        except (KeyError, ValueError) as error:
+            return "400 Bad Request", {}, f"Bad request: {error}".encode()
+
+        try:
+            # Gathering the prices does not block the other connections.
+            dates, values, names = await asyncio.get_running_loop().run_in_executor(
+                None, self.query, symbols, start_date, end_date, field
+            )
+        except Exception as error:
+            return "500 Internal Server Error", {}, f"Query failed: {error}".encode()
+        headers = {
+            "Content-Type": "application/octet-stream",
+            "X-Rows": str(len(dates)),
+            "X-Symbols": json.dumps(names),
+        }
+        body = (
+            dates.asi8.astype("<i8").tobytes()
+            + np.ascontiguousarray(values, dtype="<f8").tobytes()
+        )
+        return "200 OK", headers, body
+
+
+async def serve(port: int = PORT, service: Optional[PriceService] = None) -> None:
+    """Serves price queries on localhost until cancelled."""
+    service = service or PriceService()
+    server = await asyncio.start_server(service.handle, HOST, port, limit=MAX_LINE)
+    async with server:
+        await server.serve_forever()
+
+
+def get_stock_prices(
+    symbols: List[str],
+    start_date: str,
+    end_date: str,
+    field: str = "Adj Close",
+    port: int = PORT,
+) -> pd.DataFrame:
+    """Returns the same dataframe as `lesson_2.get_stock_prices`, from the local service."""
+    query = urlencode(
+        {
+            "symbols": ",".join(symbols),
+            "start": start_date,
+            "end": end_date,
+            "field": field,
+        }
+    )
+    connection = http.client.HTTPConnection(HOST, port)
+    try:
+        connection.request("GET", f"/prices?{query}")
+        response = connection.getresponse()
+        # A bytearray, so that the dataframe built over it is writeable.
+        body = bytearray(response.read())
+        if response.status != 200:
+            raise LookupError(body.decode())
+        rows = int(response.getheader("X-Rows"))
+        names = json.loads(response.getheader("X-Symbols"))
+    finally:
+        connection.close()
+
+    dates = np.frombuffer(body, dtype="<i8", count=rows)
+    values = np.frombuffer(body, dtype="<f8", offset=rows * 8)
+    return pd.DataFrame(
+        values.reshape(rows, len(names)),
+        index=pd.DatetimeIndex(dates.view("datetime64[ns]")),
+        columns=names,
+    )
+
+
+if __name__ == "__main__":
+    print(f"Loading data/ and serving prices on http://{HOST}:{PORT}/prices ...")
+    asyncio.run(serve())
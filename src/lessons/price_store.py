@@ -0,0 +1,257 @@
+import json
+import os
+from functools import lru_cache
+from pathlib import Path
+from typing import List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import count
+from trading_calendar import get_trading_days_between
+
+DATA_DIR = Path("data")
+STORE_DIR = DATA_DIR / "store"
+
+# Columns of the CSV files, in the order they are laid out in the store.
+FIELDS = ["Open", "High", "Low", "Close", "Volume", "Adj Close"]
+
+# Symbols converted at once by `PriceStore.get_values`.
+GATHER_CHUNK_COLUMNS = 64
+
+
+def build_store(data_dir: Path = DATA_DIR, store_dir: Path = STORE_DIR) -> Path:
+    """Converts data/*.csv into a columnar, memory-mappable store.
+
+    The store consists of:
+    - dates.npy: shared int64 date axis (nanoseconds since epoch, ascending),
+    - prices.npy: float64 cube of shape (field, date, symbol), so that every
+      field is one contiguous (date x symbol) array,
+    - meta.json: symbol and field names. It is written last and its
+      modification time is the "version" of the store.
+    """
+    store_dir.mkdir(parents=True, exist_ok=True)
+    paths = sorted(data_dir.glob("*.csv"))
+    symbols = [path.stem for path in paths]
+
+    frames = [
+        pd.read_csv(path, index_col="Date", parse_dates=True, usecols=["Date"] + FIELDS)
+        for path in paths
+    ]
+    dates = np.unique(np.concatenate([frame.index.values for frame in frames]))
+
+    prices = np.lib.format.open_memmap(
+        store_dir / "prices.npy",
+        mode="w+",
+        dtype=np.float64,
+        shape=(len(FIELDS), len(dates), len(symbols)),
+    )
+    prices[:] = np.nan
+    for column, frame in enumerate(frames):
+        rows = np.searchsorted(dates, frame.index.values)
+        for field, name in enumerate(FIELDS):
+            prices[field, rows, column] = frame[name].to_numpy(dtype=np.float64)
+    prices.flush()
+    del prices
+
+    np.save(store_dir / "dates.npy", dates.astype("datetime64[ns]").view(np.int64))
+    with open(store_dir / "meta.json", "w") as f:
+        json.dump({"symbols": symbols, "fields": FIELDS}, f)
+    return store_dir
+
+
+def _as_indexer(positions: List[int]) -> Union[slice, List[int]]:
+    """Returns a slice for evenly spaced positions (so that indexing gives a view)."""
+    if len(positions) == 1:
+        return slice(positions[0], positions[0] + 1)
+    step = positions[1] - positions[0] if len(positions) > 1 else 0
+    if step > 0 and positions == list(range(positions[0], positions[-1] + 1, step)):
+        return slice(positions[0], positions[-1] + 1, step)
+    return positions
+
+
+class Panel:
+    """Lazy (field x date x symbol) cube of a store, or of a subset of it.
+
+    Nothing is read from disk until the values are used. The values of one
+    field or symbol, of evenly spaced ones (e.g. all of them, or a range) and
+    of any range of dates are read-only views of the memory-mapped store.
+    Other subsets are gathered into a new array when their values are used.
+    """
+
+    def __init__(
+        self,
+        store: "PriceStore",
+        fields: List[str],
+        symbols: List[str],
+        rows: slice = slice(None),
+    ):
+        self.store = store
+        self.fields = fields
+        self.symbols = symbols
+        # Positions of the dates in the store.
+        self._rows = rows
+
+    @property
+    def dates(self) -> pd.DatetimeIndex:
+        return pd.DatetimeIndex(self.store.dates[self._rows].view("datetime64[ns]"))
+
+    @property
+    def values(self) -> np.ndarray:
+        """Returns the (field x date x symbol) values."""
+        fields = _as_indexer([self.store.fields.index(field) for field in self.fields])
+        columns = _as_indexer([self.store._columns[symbol] for symbol in self.symbols])
+        values = self.store.prices[:, self._rows]
+        return values[fields][:, :, columns]
+
+    def select(
+        self,
+        fields: Optional[List[str]] = None,
+        symbols: Optional[List[str]] = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+    ) -> "Panel":
+        """Returns the panel of the given fields, symbols and dates (all by default)."""
+        for names, available in [(fields, self.fields), (symbols, self.symbols)]:
+            missing = set(names or []) - set(available)
+            if missing:
+                raise KeyError(f"Not in the panel: {sorted(missing)}")
+
+        dates = self.store.dates[self._rows]
+        first, stop = 0, len(dates)
+        if start_date is not None:
+            first = np.searchsorted(dates, pd.Timestamp(start_date).value)
+        if end_date is not None:
+            stop = np.searchsorted(dates, pd.Timestamp(end_date).value, side="right")
+        offset = range(len(self.store.dates))[self._rows].start
+        return Panel(
+            self.store,
+            self.fields if fields is None else list(fields),
+            self.symbols if symbols is None else list(symbols),
+            slice(offset + first, offset + max(first, stop)),
+        )
+
+    def field(self, field: str) -> pd.DataFrame:
+        """Returns the (date x symbol) values of the field."""
+        values = self.select(fields=[field]).values[0]
+        return pd.DataFrame(values, index=self.dates, columns=self.symbols, copy=False)
+
+    def symbol(self, symbol: str) -> pd.DataFrame:
+        """Returns the (date x field) values of the symbol, like its CSV file."""
+        values = self.select(symbols=[symbol]).values[:, :, 0].T
+        return pd.DataFrame(values, index=self.dates, columns=self.fields, copy=False)
+
+
+class PriceStore:
+    """Read-only view of a store built by `build_store`.
+
+    The arrays are memory-mapped, or read into memory with `in_memory`.
+    """
+
+    def __init__(self, store_dir: Path = STORE_DIR, in_memory: bool = False):
+        meta_path = store_dir / "meta.json"
+        with open(meta_path) as f:
+            meta = json.load(f)
+        self.mtime = os.stat(meta_path).st_mtime
+        self.symbols: List[str] = meta["symbols"]
+        self.fields: List[str] = meta["fields"]
+        mmap_mode = None if in_memory else "r"
+        self.dates = np.load(store_dir / "dates.npy", mmap_mode=mmap_mode)
+        self.prices = np.load(store_dir / "prices.npy", mmap_mode=mmap_mode)
+        self.dates.flags.writeable = self.prices.flags.writeable = False
+        self._columns = {symbol: i for i, symbol in enumerate(self.symbols)}
+
+    def __contains__(self, symbol: str) -> bool:
+        """Returns whether the symbol is stored."""
+        return symbol in self._columns
+
+    def is_fresh(self, symbols: List[str], data_dir: Path = DATA_DIR) -> bool:
+        """Checks that all symbols are stored and no source CSV is newer than the store."""
+        for symbol in symbols:
+            if symbol not in self._columns:
+                return False
+            try:
+                if os.stat(data_dir / f"{symbol}.csv").st_mtime > self.mtime:
+                    return False
+            except FileNotFoundError:
+                return False
+        return True
+
+    def get_stock_prices(
+        self,
+        symbols: List[str],
+        start_date: str,
+        end_date: str,
+        field: str = "Adj Close",
+    ) -> pd.DataFrame:
+        """Returns the same dataframe as `lesson_2.get_stock_prices`, read from the store."""
+        # Keep only the days when SPY traded (the trading calendar).
+        dates = get_trading_days_between(start_date, end_date)
+        names = ["SPY"] + [symbol for symbol in symbols if symbol != "SPY"]
+        return pd.DataFrame(
+            self.get_values(names, dates, field), index=dates, columns=names
+        )
+
+    def get_panel(
+        self,
+        fields: Optional[List[str]] = None,
+        symbols: Optional[List[str]] = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+    ) -> Panel:
+        """Returns the lazy panel of the given fields, symbols and dates (all by default)."""
+        return Panel(self, self.fields, self.symbols).select(
+            fields, symbols, start_date, end_date
+        )
+
+    def get_values(
+        self,
+        symbols: List[str],
+        dates: pd.DatetimeIndex,
+        field: str = "Adj Close",
+        dtype: np.dtype = np.float64,
+    ) -> np.ndarray:
+        """Returns a new (dates x symbols) array of the field, converted to the dtype.
+
+        Stored dates are expected (see `trading_calendar.get_trading_days_between`).
+        """
+        values = self.prices[self.fields.index(field)]
+        rows = np.searchsorted(self.dates, dates.asi8)
+        columns = [self._columns[symbol] for symbol in symbols]
+        count("rows_read", len(rows))
+        count("bytes_read", len(rows) * len(columns) * values.itemsize)
+        if np.dtype(dtype) == values.dtype:
+            return values[np.ix_(rows, columns)]
+
+        # Convert a chunk of symbols at a time, so that the stored values
+        # are never all copied at their (larger) stored precision.
+        out = np.empty((len(rows), len(columns)), dtype=dtype)
+        for start in range(0, len(columns), GATHER_CHUNK_COLUMNS):
+            chunk = columns[start : start + GATHER_CHUNK_COLUMNS]
+            out[:, start : start + len(chunk)] = values[np.ix_(rows, chunk)]
+        return out
+
+
+@lru_cache(maxsize=1)
+def _open_store(store_dir: Path, mtime: float) -> PriceStore:
+    return PriceStore(store_dir)
+
+
+def open_store(store_dir: Path = STORE_DIR) -> Optional[PriceStore]:
+    """Returns the store if it has been built, otherwise None.
+
+    The store is opened once per process and reopened only when it is rebuilt.
+    """
+    try:
+        mtime = os.stat(store_dir / "meta.json").st_mtime
+    except FileNotFoundError:
+        return None
+    return _open_store(store_dir, mtime)
+
+
+if __name__ == "__main__":
+    print(f"Building price store in {STORE_DIR}...")
+    build_store()
+    store = open_store()
+    print(f"Stored {len(store.symbols)} symbols over {len(store.dates)} dates")
+    print(store.get_stock_prices(["IBM", "GOOG", "GLD"], "2010-01-22", "2010-01-26"))
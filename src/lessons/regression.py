@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+
+
+def compute_regression_stats(
+    daily_returns: pd.DataFrame, benchmark: str = "SPY"
+) -> pd.DataFrame:
+    """Returns the regression of every symbol's daily returns against the benchmark.
+
+    For each symbol (row), the result has:
+    - beta and alpha: slope and intercept of the fitted line, the same as
+      `np.polyfit(daily_returns[benchmark], daily_returns[symbol], 1)`,
+    - correlation: Pearson correlation coefficient, as `daily_returns.corr()`,
+    - residual_std: standard deviation of the residuals (with n - 2 degrees of freedom),
+    - r_squared: fraction of the symbol's variance explained by the benchmark.
+
+    All symbols are fitted at once from the centered moments of the returns.
+    Days with a missing return are ignored for that symbol only.
+    """
+    y = daily_returns.to_numpy(dtype=np.float64)
+    x = daily_returns[benchmark].to_numpy(dtype=np.float64)[:, None]
+
+    # Use only the days when both the symbol and the benchmark have a return.
+    present = ~np.isnan(y) & ~np.isnan(x)
+    if present.all():
+        count = np.full(y.shape[1], float(len(y)))
+        dx = x - x.mean()
+        dy = y - y.mean(axis=0)
+    else:
+        count = present.sum(axis=0).astype(np.float64)
+        x = np.where(present, x, 0)
+        y = np.where(present, y, 0)
+        dx = np.where(present, x - x.sum(axis=0) / count, 0)
+        dy = np.where(present, y - y.sum(axis=0) / count, 0)
+
+    sxx = (dx * dx).sum(axis=0)
+    syy = (dy * dy).sum(axis=0)
+    sxy = (dx * dy).sum(axis=0)
+
+    beta = sxy / sxx
+    alpha = y.sum(axis=0) / count - beta * x.sum(axis=0) / count
+    correlation = sxy / np.sqrt(sxx * syy)
+    # Sum of squared residuals of the fitted line.
+    residuals = np.maximum(syy - beta * sxy, 0)
+    return pd.DataFrame(
+        {
+            "beta": beta,
+            "alpha": alpha,
+            "correlation": correlation,
+            "residual_std": np.sqrt(residuals / (count - 2)),
+            "r_squared": correlation**2,
+        },
+        index=daily_returns.columns,
+    )
+
+
+if __name__ == "__main__":
+    from lesson_2 import get_stock_prices
+    from lesson_4 import compute_daily_returns
+
+    df = get_stock_prices(["SPY", "XOM", "GLD"], "2009-01-01", "2012-12-31")
+    daily_returns = compute_daily_returns(df)
+    print("Regression of XOM and GLD daily returns against SPY")
+    print(compute_regression_stats(daily_returns, benchmark="SPY"))
@@ -0,0 +1,147 @@
+from typing import Iterator, NamedTuple, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+class RollingRegression(NamedTuple):
+    """(T x N) rolling regressions of every symbol against the benchmark."""
+
+    beta: pd.DataFrame
+    alpha: pd.DataFrame
+    correlation: pd.DataFrame
+
+
+def _window_sums(values: np.ndarray, window: int) -> np.ndarray:
+    """Returns the sums of the values over every window ending at rows window - 1, ..."""
+    sums = np.zeros((len(values) + 1,) + values.shape[1:])
+    np.cumsum(values, axis=0, out=sums[1:])
+    return sums[window:] - sums[:-window]
+
+
+def _constant_windows(values: np.ndarray, window: int) -> np.ndarray:
+    """Returns whether the values never change over every window (see `_window_sums`)."""
+    changes = np.diff(values, axis=0, prepend=np.nan) != 0
+    counts = np.zeros((len(values) + 1,) + values.shape[1:])
+    np.cumsum(changes, axis=0, out=counts[1:])
+    return (counts[window:] - counts[1 : len(values) - window + 2]) == 0
+
+
+def compute_rolling_regression(
+    daily_returns: pd.DataFrame, benchmark: str = "SPY", window: int = 60
+) -> RollingRegression:
+    """Returns the rolling beta, alpha and correlation of every symbol against the benchmark.
+
+    The window sums of the returns, their squares and their products with the
+    benchmark returns are differences of cumulative sums, so the cost is
+    O(T x N) whatever the window. Windows with a missing return are NaN, as
+    with pandas' rolling functions.
+    """
+    y = daily_returns.to_numpy(dtype=np.float64)
+    x = daily_returns[benchmark].to_numpy(dtype=np.float64)[:, None]
+    beta = np.full(y.shape, np.nan)
+    alpha = np.full(y.shape, np.nan)
+    correlation = np.full(y.shape, np.nan)
+
+    if window <= len(y):
+        missing = np.isnan(y) | np.isnan(x)
+        # Center the returns to limit the cancellation in the sums of squares.
+        x_center = np.nanmean(x)
+        y_center = np.where(
+            missing.all(axis=0), 0, np.nanmean(np.where(missing, np.nan, y), axis=0)
+        )
+        dx = np.where(missing, 0, x - x_center)
+        dy = np.where(missing, 0, y - y_center)
+
+        sx = _window_sums(dx, window)
+        sy = _window_sums(dy, window)
+        sxx = _window_sums(dx * dx, window) - sx * sx / window
+        syy = _window_sums(dy * dy, window) - sy * sy / window
+        sxy = _window_sums(dx * dy, window) - sx * sy / window
+        complete = _window_sums(missing, window) == 0
+
+        # Rounding leaves tiny variances where the returns do not change at all,
+        # make them exactly 0 (the correlation is then NaN, as with pandas).
+        sxx = np.where(_constant_windows(x, window), 0, sxx)
+        constant = _constant_windows(y, window)
+        syy = np.where(constant, 0, syy)
+        sxy = np.where(constant, 0, sxy)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            window_beta = sxy / sxx
+            window_alpha = (sy / window + y_center) - window_beta * (
+                sx / window + x_center
+            )
+            window_correlation = sxy / np.sqrt(sxx * syy)
+        beta[window - 1 :] = np.where(complete, window_beta, np.nan)
+        alpha[window - 1 :] = np.where(complete, window_alpha, np.nan)
+        correlation[window - 1 :] = np.where(complete, window_correlation, np.nan)
+
+    def to_frame(values: np.ndarray) -> pd.DataFrame:
+        return pd.DataFrame(
+            values, index=daily_returns.index, columns=daily_returns.columns
+        )
+
+    return RollingRegression(to_frame(beta), to_frame(alpha), to_frame(correlation))
+
+
+def iter_rolling_correlation_matrices(
+    daily_returns: pd.DataFrame, window: int = 60, max_bytes: int = 256 * 2**20
+) -> Iterator[Tuple[pd.DatetimeIndex, np.ndarray]]:
+    """Yields the rolling (N x N) correlation matrices in chunks of days.
+
+    Each chunk is (dates, D x N x N matrices), with D chosen so that a chunk
+    takes at most `max_bytes` (but at least one day). The window sums of the
+    return products are updated by adding the newest day and removing the
+    oldest one, so each day costs O(N^2). They are recomputed from scratch once
+    per window to stop rounding errors from accumulating.
+
+    NOTE: Missing returns are treated as 0 (as `lesson_4.compute_daily_returns` does).
+    """
+    returns = np.nan_to_num(daily_returns.to_numpy(dtype=np.float64))
+    # Center the returns to limit the cancellation in the sums of squares.
+    returns = returns - returns.mean(axis=0)
+    n_days, n = returns.shape
+    chunk_days = max(1, max_bytes // (n * n * 8))
+    # Symbols whose returns do not change have no correlation (NaN, as with pandas).
+    constant = _constant_windows(returns, window) if window <= n_days else None
+
+    sums = None
+    products = None
+    for chunk_start in range(window - 1, n_days, chunk_days):
+        chunk_end = min(chunk_start + chunk_days, n_days)
+        matrices = np.empty((chunk_end - chunk_start, n, n))
+        for i, day in enumerate(range(chunk_start, chunk_end)):
+            if (day - window + 1) % window == 0:
+                days = returns[day - window + 1 : day + 1]
+                sums = days.sum(axis=0)
+                products = days.T @ days
+            else:
+                newest = returns[day]
+                oldest = returns[day - window]
+                sums += newest - oldest
+                products += np.outer(newest, newest) - np.outer(oldest, oldest)
+            covariance = products - np.outer(sums, sums) / window
+            std = np.sqrt(np.maximum(np.diag(covariance), 0))
+            # Rounding leaves a tiny covariance, whose ratio to 0 would be inf.
+            std[constant[day - window + 1]] = np.nan
+            with np.errstate(divide="ignore", invalid="ignore"):
+                matrices[i] = covariance / np.outer(std, std)
+        yield daily_returns.index[chunk_start:chunk_end], matrices
+
+
+if __name__ == "__main__":
+    from lesson_2 import get_stock_prices
+    from lesson_4 import compute_daily_returns
+
+    df = get_stock_prices(["SPY", "XOM", "GLD", "GOOG"], "2009-01-01", "2012-12-31")
+    daily_returns = compute_daily_returns(df)
+
+    regression = compute_rolling_regression(daily_returns, benchmark="SPY", window=60)
+    print("Rolling 60-day betas against SPY")
+    print(regression.beta.dropna().tail())
+
+    print("Last rolling 60-day correlation matrix")
+    for dates, matrices in iter_rolling_correlation_matrices(daily_returns, window=60):
+        pass
+    print(pd.DataFrame(matrices[-1], index=df.columns, columns=df.columns))
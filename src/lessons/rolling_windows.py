@@ -0,0 +1,104 @@
+from typing import Iterator, List, NamedTuple, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+
+class RollingStats(NamedTuple):
+    """(W x T x N) rolling means and standard deviations, one layer per window."""
+
+    windows: List[int]
+    mean: np.ndarray
+    std: np.ndarray
+
+
+def iter_rolling_mean_std(
+    prices: Union[pd.DataFrame, np.ndarray], windows: List[int]
+) -> Iterator[Tuple[int, np.ndarray, np.ndarray]]:
+    """Yields (window, T x N mean, T x N std) for every window, one at a time.
+
+    All windows are computed from the same cumulative sums (and sums of squares)
+    of the (T x N) prices, so the prices are scanned once whatever the number
+    of windows. Only one window's results are held in memory at a time.
+
+    The results match `lesson_4.get_rolling_mean` and `get_rolling_std` (up to
+    rounding): they are NaN for the first window - 1 rows and for windows that
+    contain a missing price.
+
+    NOTE: The rounding error of the cumulative sums grows with the length of the
+    series, so standard deviations that are tiny compared to the price
+    (e.g. 1e-4 for a $100 price over 3,000 days) lose relative precision.
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    missing = np.isnan(prices)
+
+    # Sums of squares lose precision for large prices, so work on the
+    # deviations from each symbol's mean price instead.
+    with np.errstate(invalid="ignore"):
+        reference = np.nanmean(np.where(missing.all(axis=0), 0, prices), axis=0)
+    deviations = np.where(missing, 0, prices - reference)
+
+    def cumulative_sum(values: np.ndarray) -> np.ndarray:
+        # Prepend a row of zeros so that sum(values[i:j]) = sums[j] - sums[i].
+        sums = np.zeros((len(values) + 1, values.shape[1]))
+        np.cumsum(values, axis=0, out=sums[1:])
+        return sums
+
+    sums = cumulative_sum(deviations)
+    squares = cumulative_sum(deviations**2)
+    missing_counts = cumulative_sum(missing)
+    # A window whose prices never change has a standard deviation of exactly 0.
+    change_counts = cumulative_sum(np.diff(prices, axis=0, prepend=np.nan) != 0)
+
+    for window in windows:
+        mean = np.full(prices.shape, np.nan)
+        std = np.full(prices.shape, np.nan)
+        if window <= len(prices):
+            window_sum = sums[window:] - sums[:-window]
+            window_squares = squares[window:] - squares[:-window]
+            complete = (missing_counts[window:] - missing_counts[:-window]) == 0
+
+            mean[window - 1 :] = np.where(
+                complete, window_sum / window + reference, np.nan
+            )
+            if window > 1:
+                variance = (window_squares - window_sum**2 / window) / (window - 1)
+                changes = (
+                    change_counts[window:] - change_counts[1 : len(prices) - window + 2]
+                )
+                variance[changes == 0] = 0
+                # Rounding may leave a tiny negative variance for a constant window.
+                std[window - 1 :] = (
+                    np.where(complete, np.maximum(variance, 0), np.nan) ** 0.5
+                )
+        yield window, mean, std
+
+
+def rolling_mean_std(
+    prices: Union[pd.DataFrame, np.ndarray], windows: List[int]
+) -> RollingStats:
+    """Returns the rolling means and standard deviations of the (T x N) prices
+    for all windows at once (see `iter_rolling_mean_std`).
+    """
+    means = []
+    stds = []
+    for _, mean, std in iter_rolling_mean_std(prices, windows):
+        means.append(mean)
+        stds.append(std)
+    return RollingStats(list(windows), np.stack(means), np.stack(stds))
+
+
+if __name__ == "__main__":
+    from lesson_2 import get_stock_prices
+
+    df = get_stock_prices(["XOM", "GOOG", "GLD"], "2008-01-01", "2012-12-31")
+    windows = [10, 20, 50, 200]
+    stats = rolling_mean_std(df, windows)
+    print("Shape of the rolling means:", stats.mean.shape)
+
+    for window, mean, std in iter_rolling_mean_std(df, windows):
+        upper_band = mean + std * 2
+        print(
+            f"Last {window}-day upper Bollinger bands:",
+            dict(zip(df.columns, upper_band[-1])),
+        )
@@ -0,0 +1,227 @@
+import io
+import os
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import count, propagate
+
+DATA_DIR = Path("data")
+
+# Bytes read at once from the end of a file by `read_tail` (doubled as needed).
+TAIL_BLOCK_SIZE = 4096
+
+
+class Aggregation(ABC):
+    """Aggregates the chunks of one symbol's CSV file into one value.
+
+    Subclasses list the `columns` they need (so that only those are parsed),
+    update their state with every chunk and return the value at the end.
+    """
+
+    columns: List[str] = []
+
+    @abstractmethod
+    def update(self, chunk: pd.DataFrame) -> None:
+        pass
+
+    @abstractmethod
+    def result(self) -> Any:
+        pass
+
+
+class Mean(Aggregation):
+    """Mean of a column (e.g. Volume), skipping missing values."""
+
+    def __init__(self, column: str):
+        self.columns = [column]
+        self.total = 0.0
+        self.count = 0
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        values = chunk[self.columns[0]]
+        self.total += values.sum()
+        self.count += values.count()
+
+    def result(self) -> float:
+        return self.total / self.count if self.count else np.nan
+
+
+class Max(Aggregation):
+    """Maximum of a column (e.g. High)."""
+
+    def __init__(self, column: str):
+        self.columns = [column]
+        self.value = np.nan
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        # fmax skips NaN (an empty chunk's maximum) without warnings.
+        self.value = np.fmax(self.value, chunk[self.columns[0]].max())
+
+    def result(self) -> float:
+        return self.value
+
+
+class Min(Aggregation):
+    """Minimum of a column (e.g. Low)."""
+
+    def __init__(self, column: str):
+        self.columns = [column]
+        self.value = np.nan
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        self.value = np.fmin(self.value, chunk[self.columns[0]].min())
+
+    def result(self) -> float:
+        return self.value
+
+
+class RowCount(Aggregation):
+    """Number of rows."""
+
+    def __init__(self):
+        self.count = 0
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        self.count += len(chunk)
+
+    def result(self) -> int:
+        return self.count
+
+
+class FirstDate(Aggregation):
+    """Earliest date (the files in data/ are sorted newest first)."""
+
+    columns = ["Date"]
+
+    def __init__(self):
+        self.value: Optional[pd.Timestamp] = None
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        if len(chunk):
+            first = chunk["Date"].min()
+            self.value = first if self.value is None else min(self.value, first)
+
+    def result(self) -> Optional[pd.Timestamp]:
+        return self.value
+
+
+class LastDate(FirstDate):
+    """Latest date."""
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        if len(chunk):
+            last = chunk["Date"].max()
+            self.value = last if self.value is None else max(self.value, last)
+
+
+# Returns a new aggregation (one is created per symbol).
+AggregationFactory = Callable[[], Aggregation]
+
+
+def scan_symbol(
+    symbol: str,
+    aggregations: Dict[str, AggregationFactory],
+    chunksize: int = 10_000,
+    data_dir: Path = DATA_DIR,
+) -> Dict[str, Any]:
+    """Returns the aggregations of the symbol's CSV file, read `chunksize` rows at a time.
+
+    Only the columns needed by the aggregations are parsed, and at most one
+    chunk is held in memory.
+    """
+    aggregators = {name: factory() for name, factory in aggregations.items()}
+    columns = {
+        column for aggregator in aggregators.values() for column in aggregator.columns
+    }
+    path = data_dir / f"{symbol}.csv"
+    with pd.read_csv(
+        path,
+        # A row count alone still needs one column to be parsed.
+        usecols=sorted(columns) or ["Date"],
+        parse_dates=["Date"] if "Date" in columns else False,
+        chunksize=chunksize,
+    ) as chunks:
+        for chunk in chunks:
+            count("rows_read", len(chunk))
+            for aggregator in aggregators.values():
+                aggregator.update(chunk)
+    count("bytes_read", os.stat(path).st_size)
+    return {name: aggregator.result() for name, aggregator in aggregators.items()}
+
+
+def scan(
+    aggregations: Dict[str, AggregationFactory],
+    symbols: Optional[List[str]] = None,
+    chunksize: int = 10_000,
+    max_workers: Optional[int] = None,
+    data_dir: Path = DATA_DIR,
+) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """Yields (symbol, aggregations) of every symbol (by default, all in data/) as it completes.
+
+    The files are scanned by a pool of `max_workers` threads, each one
+    chunk by chunk (see `scan_symbol`), so the memory used is bounded by the
+    number of workers whatever the number of files.
+
+    Example:
+        for symbol, result in scan({"mean_volume": lambda: Mean("Volume")}):
+            print(symbol, result["mean_volume"])
+    """
+    if symbols is None:
+        symbols = sorted(path.stem for path in data_dir.glob("*.csv"))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(
+                propagate(scan_symbol), symbol, aggregations, chunksize, data_dir
+            ): symbol
+            for symbol in symbols
+        }
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+
+
+def read_tail(path: Path, n: int = 5) -> pd.DataFrame:
+    """Returns the last n rows of the CSV file, reading only the end of the file.
+
+    Blocks are read backwards from the end of the file until they hold
+    n complete rows. The rows are numbered from 0.
+    """
+    with open(path, "rb") as f:
+        header = f.readline()
+        start_of_rows = f.tell()
+        size = f.seek(0, io.SEEK_END)
+        block_size = TAIL_BLOCK_SIZE
+        while True:
+            start = max(start_of_rows, size - block_size)
+            f.seek(start)
+            tail = f.read(size - start)
+            # One more newline than rows (the one ending the previous row),
+            # unless the rows start right after the header.
+            lines = tail.rstrip(b"\n").split(b"\n")
+            if start == start_of_rows or len(lines) > n:
+                break
+            block_size *= 2
+    rows = lines if start == start_of_rows else lines[1:]
+    rows = rows[-n:] if n > 0 else []
+    count("bytes_read", len(header) + len(tail))
+    return pd.read_csv(io.BytesIO(header + b"\n".join(rows) + b"\n"))
+
+
+if __name__ == "__main__":
+    aggregations = {
+        "mean_volume": lambda: Mean("Volume"),
+        "max_high": lambda: Max("High"),
+        "rows": RowCount,
+        "first_date": FirstDate,
+        "last_date": LastDate,
+    }
+    print("Scanning all symbols in data/...")
+    results = dict(scan(aggregations))
+    print(pd.DataFrame.from_dict(results, orient="index").sort_index().head(10))
+
+    print("Last 5 rows of AAPL (read from the end of the file)")
+    print(read_tail(Path("data/AAPL.csv"), 5))
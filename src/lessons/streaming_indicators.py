@@ -0,0 +1,132 @@
+from typing import List, NamedTuple
+
+import numpy as np
+
+
+class Bands(NamedTuple):
+    """Rolling mean, rolling standard deviation and Bollinger Bands."""
+
+    mean: np.ndarray
+    std: np.ndarray
+    upper: np.ndarray
+    lower: np.ndarray
+
+
+class RollingBands:
+    """Incrementally updated rolling mean, standard deviation and Bollinger Bands.
+
+    Each tick costs O(1) per symbol: the window's mean and sum of squared
+    deviations are updated by removing the oldest price and adding the new one
+    (Welford's algorithm), instead of rescanning the window. Only the last
+    `window` prices are kept. To stop rounding errors from accumulating, the
+    values are recomputed from the kept prices once per window (amortized O(1)).
+
+    The results match `lesson_4.get_rolling_mean`, `get_rolling_std` and
+    `get_bollinger_bands`: they are NaN until the window is full and while it
+    contains a missing price.
+    """
+
+    def __init__(self, symbols: List[str], window: int, num_std: float = 2):
+        self.symbols = symbols
+        self.window = window
+        self.num_std = num_std
+        n = len(symbols)
+        # Ring buffer of the last `window` prices.
+        self._prices = np.full((window, n), np.nan)
+        self._position = 0
+        # Number of (non-missing) prices, their mean and
+        # sum of squared deviations from the mean.
+        self._count = np.zeros(n)
+        self._mean = np.zeros(n)
+        self._m2 = np.zeros(n)
+        # Number of consecutive equal prices (their standard deviation is exactly 0).
+        self._repeats = np.zeros(n)
+        self._last = np.full(n, np.nan)
+
+    def update(self, prices: np.ndarray) -> Bands:
+        """Adds the next price of every symbol and returns the updated values."""
+        prices = np.asarray(prices, dtype=np.float64)
+        oldest = self._prices[self._position]
+
+        # Remove the oldest price (if the window is full and it is not missing).
+        removed = ~np.isnan(oldest)
+        self._count[removed] -= 1
+        emptied = removed & (self._count == 0)
+        remaining = removed & ~emptied
+        delta = oldest[remaining] - self._mean[remaining]
+        self._mean[remaining] -= delta / self._count[remaining]
+        self._m2[remaining] -= delta * (oldest[remaining] - self._mean[remaining])
+        self._mean[emptied] = 0
+        self._m2[emptied] = 0
+        # A single price has no deviation, drop the rounding error left by the removal.
+        self._m2[self._count == 1] = 0
+
+        # Add the new price (if it is not missing).
+        added = ~np.isnan(prices)
+        self._count[added] += 1
+        delta = prices[added] - self._mean[added]
+        self._mean[added] += delta / self._count[added]
+        self._m2[added] += delta * (prices[added] - self._mean[added])
+
+        self._repeats = np.where(prices == self._last, self._repeats + 1, 1)
+        self._last = prices
+
+        self._prices[self._position] = prices
+        self._position = (self._position + 1) % self.window
+        if self._position == 0:
+            self._recompute()
+        return self.values()
+
+    def update_batch(self, prices: np.ndarray) -> Bands:
+        """Adds the next (B x N) prices, one row per tick, and returns (B x N) values."""
+        results = [self.update(row) for row in np.asarray(prices, dtype=np.float64)]
+        return Bands(*(np.array(values) for values in zip(*results)))
+
+    def _recompute(self) -> None:
+        """Recomputes the mean and sum of squared deviations from the kept prices."""
+        present = ~np.isnan(self._prices)
+        self._count = present.sum(axis=0).astype(np.float64)
+        sums = np.where(present, self._prices, 0).sum(axis=0)
+        self._mean = np.divide(
+            sums, self._count, out=np.zeros_like(sums), where=self._count > 0
+        )
+        deviations = np.where(present, self._prices - self._mean, 0)
+        self._m2 = (deviations**2).sum(axis=0)
+
+    def values(self) -> Bands:
+        """Returns the current values."""
+        full = self._count == self.window
+        mean = np.where(full, self._mean, np.nan)
+        if self.window > 1:
+            # Rounding may leave a tiny negative sum for a constant window.
+            variance = np.maximum(self._m2, 0) / (self.window - 1)
+            variance = np.where(self._repeats >= self.window, 0, variance)
+        else:
+            variance = np.full(len(self.symbols), np.nan)
+        std = np.where(full, variance, np.nan) ** 0.5
+        return Bands(
+            mean=mean,
+            std=std,
+            upper=mean + std * self.num_std,
+            lower=mean - std * self.num_std,
+        )
+
+
+if __name__ == "__main__":
+    from lesson_2 import get_stock_prices
+    from lesson_4 import get_bollinger_bands, get_rolling_mean, get_rolling_std
+
+    df = get_stock_prices(["SPY", "XOM", "JAVA"], "2009-01-01", "2012-12-31")
+
+    print("Streaming Bollinger bands of SPY, XOM, JAVA (20-day window)...")
+    bands = RollingBands(list(df.columns), window=20)
+    streamed = bands.update_batch(df.to_numpy())
+    print("Last upper bands:", dict(zip(df.columns, streamed.upper[-1])))
+
+    rm = get_rolling_mean(df["SPY"], 20)
+    rstd = get_rolling_std(df["SPY"], 20)
+    upper_band, lower_band = get_bollinger_bands(rm, rstd)
+    print(
+        "Max difference with pandas (SPY upper band):",
+        np.nanmax(np.abs(streamed.upper[:, 0] - upper_band.to_numpy())),
+    )
@@ -0,0 +1,61 @@
+import os
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from csv_index import load_index
+
+# SPY traded on every trading day, so its dates are the trading calendar.
+REFERENCE_PATH = Path("data/SPY.csv")
+
+
+@lru_cache(maxsize=1)
+def _trading_days(mtime: float) -> pd.DatetimeIndex:
+    # The dates come from the sidecar index, so the prices are not parsed.
+    dates = np.sort(load_index(REFERENCE_PATH).dates).astype("datetime64[ns]")
+    return pd.DatetimeIndex(dates)
+
+
+def get_trading_days() -> pd.DatetimeIndex:
+    """Returns all trading days (ascending), built once per process from SPY.csv.
+
+    NOTE: The index is shared, do not modify it.
+    """
+    return _trading_days(os.stat(REFERENCE_PATH).st_mtime)
+
+
+def trading_day_positions(start_date: str, end_date: str) -> slice:
+    """Returns the positions of the trading days from start to end date (inclusive)."""
+    days = get_trading_days()
+    lo = days.searchsorted(pd.Timestamp(start_date), side="left")
+    hi = days.searchsorted(pd.Timestamp(end_date), side="right")
+    return slice(lo, hi)
+
+
+def get_trading_days_between(start_date: str, end_date: str) -> pd.DatetimeIndex:
+    """Returns the trading days from start to end date (inclusive)."""
+    return get_trading_days()[trading_day_positions(start_date, end_date)]
+
+
+def first_trading_day(start_date: str) -> Optional[pd.Timestamp]:
+    """Returns the first trading day on or after the date, if any."""
+    days = get_trading_days()
+    position = days.searchsorted(pd.Timestamp(start_date), side="left")
+    return days[position] if position < len(days) else None
+
+
+def last_trading_day(end_date: str) -> Optional[pd.Timestamp]:
+    """Returns the last trading day on or before the date, if any."""
+    days = get_trading_days()
+    position = days.searchsorted(pd.Timestamp(end_date), side="right")
+    return days[position - 1] if position > 0 else None
+
+
+if __name__ == "__main__":
+    print("Trading days from 2010-01-01 to 2010-01-10")
+    print(get_trading_days_between("2010-01-01", "2010-01-10"))
+    print("First trading day of 2010:", first_trading_day("2010-01-01"))
+    print("Last trading day of 2010:", last_trading_day("2010-12-31"))
@@ -0,0 +1,80 @@
+import sys
+from pathlib import Path
+from typing import List
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# The lessons import each other as top-level modules.
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src" / "lessons"))
+
+# Symbols of the `data_dir` fixture and the number of days SPY traded.
+SYMBOLS = ["SPY", "AAA", "BBB"]
+N_DAYS = 500
+
+
+def _clear_caches() -> None:
+    import csv_index
+    import lesson_2
+    import price_store
+    import trading_calendar
+
+    csv_index._load_index.cache_clear()
+    trading_calendar._trading_days.cache_clear()
+    price_store._open_store.cache_clear()
+    lesson_2.clear_cache()
+
+
+@pytest.fixture
+def prices(request) -> pd.DataFrame:
+    """Random prices of SYMBOLS on 300 business days.
+
+    Parametrize it indirectly with a number of days for another length.
+    """
+    n_days = getattr(request, "param", 300)
+    rng = np.random.default_rng(0)
+    returns = 1 + 0.01 * rng.standard_normal((n_days, len(SYMBOLS)))
+    dates = pd.bdate_range("2010-01-04", periods=n_days)
+    return pd.DataFrame(100 * np.cumprod(returns, axis=0), index=dates, columns=SYMBOLS)
+
+
+@pytest.fixture
+def allocations() -> List[float]:
+    """Allocations of a portfolio of SYMBOLS."""
+    return [0.5, 0.3, 0.2]
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch) -> Path:
+    """Makes a data/ directory of random prices the working directory's.
+
+    The CSV files are laid out as in data/: newest rows first. AAA starts
+    trading 50 days after SPY and BBB has a 10 day gap.
+    """
+    rng = np.random.default_rng(0)
+    dates = pd.bdate_range("2010-01-04", periods=N_DAYS)
+    (tmp_path / "data").mkdir()
+    for i, symbol in enumerate(SYMBOLS):
+        close = 50 * (i + 1) * np.cumprod(1 + 0.01 * rng.standard_normal(N_DAYS))
+        df = pd.DataFrame(
+            {
+                "Date": dates.strftime("%Y-%m-%d"),
+                "Open": close,
+                "High": close * 1.01,
+                "Low": close * 0.99,
+                "Close": close,
+                "Volume": rng.integers(1_000, 10_000, N_DAYS),
+                "Adj Close": close.round(2),
+            }
+        )
+        if symbol == "AAA":
+            df = df.iloc[50:]
+        elif symbol == "BBB":
+            df = df.drop(df.index[200:210])
+        df.iloc[::-1].to_csv(tmp_path / "data" / f"{symbol}.csv", index=False)
+
+    monkeypatch.chdir(tmp_path)
+    _clear_caches()
+    yield tmp_path / "data"
+    _clear_caches()
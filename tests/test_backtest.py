@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from backtest import backtest, rebalance_days
+from lesson_2 import get_stock_prices
+from lesson_7 import compute_portfolio_value
+
+from .conftest import SYMBOLS
+
+
+def test_buy_and_hold_matches_lesson_7(data_dir, allocations):
+    # Every symbol has a price on every day of the range (see conftest.py).
+    start_date, end_date = "2010-04-01", "2010-09-30"
+    prices = get_stock_prices(SYMBOLS, start_date, end_date)
+    assert not prices.isna().any().any()
+    result = backtest(prices, allocations, 1_000_000, rebalance=None)
+    expected = compute_portfolio_value(
+        1_000_000, SYMBOLS, allocations, start_date, end_date
+    )
+    pd.testing.assert_series_equal(result.portfolio_value, expected, check_freq=False)
+
+
+def test_rebalancing_matches_daily_returns(prices, allocations):
+    result = backtest(prices, allocations, rebalance=1)
+    # Rebalanced every day, the portfolio earns the allocated daily returns.
+    returns = (prices.pct_change().iloc[1:] * allocations).sum(axis=1)
+    expected = np.cumprod(np.r_[1, 1 + returns.to_numpy()])
+    np.testing.assert_allclose(result.portfolio_value, expected)
+
+
+def test_costs_are_paid_out_of_the_invested_value(prices, allocations):
+    cost_rate = 0.01
+    result = backtest(prices, [0.6, 0.4, 0.0], rebalance=20, cost_rate=cost_rate)
+    days = rebalance_days(prices.index, 20)
+    assert (result.costs.iloc[days] > 0).all()
+    # The first day buys (value - cost) of shares, and pays cost_rate of it.
+    cost = result.costs.iloc[0]
+    assert cost == pytest.approx(cost_rate * (1 - cost))
+
+    # Fully invested, no cash is left (or borrowed): all the value moves with
+    # the prices, net of the costs.
+    value = backtest(prices, [0.6, 0.4, 0.0], rebalance=None, cost_rate=cost_rate)
+    no_costs = backtest(prices, [0.6, 0.4, 0.0], rebalance=None)
+    np.testing.assert_allclose(
+        value.portfolio_value, no_costs.portfolio_value * (1 - value.costs.iloc[0])
+    )
+
+
+def test_rebalance_every_numpy_integer_days(prices, allocations):
+    np.testing.assert_array_equal(
+        rebalance_days(prices.index, np.int64(50)), np.arange(0, 300, 50)
+    )
+
+
+@pytest.mark.parametrize("rebalance", [0, -5, True])
+def test_invalid_rebalance(prices, rebalance):
+    with pytest.raises(ValueError):
+        rebalance_days(prices.index, rebalance)
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from charts import downsample, lttb, minmax, render_chart, render_chart_pack
+
+
+def test_lttb_keeps_the_ends_and_the_peaks():
+    x = np.arange(1_000)
+    y = np.zeros(1_000)
+    y[437] = 10.0  # A spike
+    indices = lttb(x, y, 50)
+    assert len(indices) == 50
+    assert indices[0] == 0 and indices[-1] == 999
+    assert (np.diff(indices) > 0).all()
+    assert 437 in indices
+    # Nothing to drop
+    np.testing.assert_array_equal(lttb(x[:40], y[:40], 50), np.arange(40))
+
+
+def test_minmax_keeps_every_bucket_extreme():
+    rng = np.random.default_rng(0)
+    y = rng.standard_normal(1_000)
+    indices = minmax(y, 10)
+    assert (np.diff(indices) > 0).all()
+    assert {0, 999} <= set(indices)
+    for bucket in np.array_split(np.arange(1_000), 10):
+        assert bucket[np.argmin(y[bucket])] in indices
+        assert bucket[np.argmax(y[bucket])] in indices
+    assert len(indices) <= 2 * 10 + 2
+
+
+def test_downsample_skips_missing_values(prices):
+    series = prices["SPY"].copy()
+    series.iloc[:10] = np.nan
+    for method in ["lttb", "minmax"]:
+        x, y = downsample(series, 50, method)
+        assert len(x) <= 52
+        assert not np.isnan(y).any()
+        assert x[0] == series.index[10] and x[-1] == series.index[-1]
+    with pytest.raises(ValueError):
+        downsample(series, 50, "every_other")
+
+
+@pytest.mark.parametrize("fmt, magic", [("png", b"\x89PNG"), ("svg", b"<?xml")])
+def test_render_chart(prices, tmp_path, fmt, magic):
+    path = render_chart(prices, tmp_path / f"prices.{fmt}", width=300, height=200)
+    assert path.read_bytes().startswith(magic)
+
+
+def test_render_chart_pack(prices, tmp_path):
+    paths = render_chart_pack(
+        prices, tmp_path / "charts", width=300, height=200, batch_size=1, max_workers=2
+    )
+    assert [path.name for path in paths] == ["AAA.png", "BBB.png"]
+    assert all(path.read_bytes().startswith(b"\x89PNG") for path in paths)
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from lesson_2 import get_compact_prices, get_stock_prices, normalize_prices
+from lesson_4 import compute_cumulative_returns, compute_daily_returns
+from lesson_7 import compute_portfolio_value
+
+from .conftest import SYMBOLS
+
+U = 2.0**-24
+RANGE = ("2010-01-01", "2011-12-31")
+
+
+@pytest.fixture
+def both(data_dir):
+    """The float64 and the compact prices of SYMBOLS (with missing prices)."""
+    return get_stock_prices(SYMBOLS, *RANGE), get_compact_prices(SYMBOLS, *RANGE)
+
+
+def test_same_prices_in_float32(both):
+    prices, compact = both
+    assert compact.values.dtype == np.float32
+    assert compact.symbols == list(prices.columns)
+    assert (compact.dates == prices.index).all()
+    np.testing.assert_allclose(compact.values, prices, rtol=U)
+    np.testing.assert_array_equal(np.isnan(compact.values), prices.isna())
+
+
+def test_ratios_within_3u(both):
+    prices, compact = both
+    prices = prices.iloc[:, [0, 2]]  # AAA has no first price
+    compact = compact._replace(values=compact.values[:, [0, 2]])
+    np.testing.assert_allclose(
+        normalize_prices(compact).values, normalize_prices(prices), rtol=3 * U
+    )
+
+
+def test_returns_within_4u(both):
+    prices, compact = both
+    for compute in [compute_daily_returns, compute_cumulative_returns]:
+        expected = compute(prices).to_numpy()
+        actual = compute(compact).values
+        error = np.abs(actual - expected)
+        bound = 4 * U * (1 + np.abs(expected))
+        assert (error[~np.isnan(expected)] <= bound[~np.isnan(expected)]).all()
+        np.testing.assert_array_equal(np.isnan(actual), np.isnan(expected))
+
+
+def test_portfolio_value_within_3u(data_dir):
+    # Exact in float32, so only the rounding of the prices counts.
+    allocations = [0.5, 0.25, 0.25]
+    expected = compute_portfolio_value(1_000_000, SYMBOLS, allocations, *RANGE)
+    actual = compute_portfolio_value(
+        1_000_000, SYMBOLS, allocations, *RANGE, compact=True
+    )
+    np.testing.assert_allclose(actual, expected, rtol=3 * U)
@@ -0,0 +1,90 @@
+import numpy as np
+
+from curve_fitting import fit_curves, fit_polys
+
+
+def test_fit_polys_matches_polyfit():
+    rng = np.random.default_rng(0)
+    x = np.linspace(-10, 10, 30)
+    y = rng.normal(size=(5, len(x))) + np.polyval([0.5, -2, 3], x)
+    result = fit_polys(x, y, degree=2)
+    for coeffs, values in zip(result.coeffs, y):
+        np.testing.assert_allclose(coeffs, np.polyfit(x, values, 2), atol=1e-10)
+    assert result.converged.all()
+
+
+def test_fit_polys_ignores_missing_values():
+    rng = np.random.default_rng(1)
+    x = np.linspace(0, 5, 20)
+    y = rng.normal(size=(3, len(x))) + 2 * x + 1
+    y[0, :5] = np.nan
+    result = fit_polys(x, y, degree=1)
+    known = ~np.isnan(y[0])
+    np.testing.assert_allclose(
+        result.coeffs[0], np.polyfit(x[known], y[0, known], 1), atol=1e-10
+    )
+    np.testing.assert_array_equal(result.n_obs, [15, 20, 20])
+
+
+def test_fit_polys_flags_series_with_too_few_points():
+    rng = np.random.default_rng(2)
+    x = np.linspace(0, 5, 20)
+    y = rng.normal(size=(4, len(x))) + 2 * x + 1
+    y[1] = np.nan  # Delisted
+    y[2, 1:] = np.nan  # A single point
+    result = fit_polys(x, y, degree=1)
+    np.testing.assert_array_equal(result.converged, [True, False, False, True])
+    assert np.isnan(result.coeffs[[1, 2]]).all()
+    assert np.isnan(result.sse[[1, 2]]).all()
+    np.testing.assert_allclose(result.coeffs[3], np.polyfit(x, y[3], 1), atol=1e-10)
+
+
+def test_fit_polys_with_fewer_points_than_params():
+    result = fit_polys(np.arange(2.0), np.ones((3, 2)), degree=3)
+    assert not result.converged.any()
+    assert np.isnan(result.coeffs).all()
+
+
+def exponential(x: np.ndarray, params: np.ndarray) -> np.ndarray:
+    return params[:, :1] * np.exp(params[:, 1:] * x)
+
+
+def exponential_jacobian(x: np.ndarray, params: np.ndarray) -> np.ndarray:
+    growth = np.exp(params[:, 1:] * x)
+    return np.stack([growth, params[:, :1] * x * growth], axis=-1)
+
+
+def test_fit_curves_flags_series_that_cannot_be_fitted():
+    rng = np.random.default_rng(3)
+    x = np.linspace(0, 2, 30)
+    y = 2 * np.exp(0.8 * x) + rng.normal(0, 0.1, (4, len(x)))
+    y[1] = np.nan  # Delisted
+    y[2, 1:] = np.nan  # A single point
+    result = fit_curves(exponential, exponential_jacobian, x, y, [1.0, 0.0])
+    np.testing.assert_array_equal(result.converged, [True, False, False, True])
+    np.testing.assert_array_equal(result.n_obs, [30, 0, 1, 30])
+    for values in (result.coeffs, result.sse, result.r_squared, result.residual_std):
+        assert np.isnan(values[[1, 2]]).all()
+    np.testing.assert_allclose(result.coeffs[[0, 3]], [[2, 0.8]] * 2, atol=0.1)
+
+
+def test_fit_curves_skips_non_finite_starts():
+    x = np.linspace(0, 2, 30)
+    y = 2 * np.exp(0.8 * x)
+    # exp(1000 * x) overflows: only the second start can be fitted.
+    starts = np.array([[1.0, 1000.0], [1.0, 0.0]])
+    result = fit_curves(exponential, exponential_jacobian, x, y, starts)
+    assert result.converged.all()
+    np.testing.assert_allclose(result.coeffs[0], [2, 0.8], rtol=1e-6)
+
+    result = fit_curves(exponential, exponential_jacobian, x, y, starts[:1])
+    assert not result.converged.any()
+    assert np.isnan(result.coeffs).all()
+
+
+def test_fit_curves_has_not_converged_after_max_iter():
+    x = np.linspace(0, 2, 30)
+    y = 2 * np.exp(0.8 * x)
+    result = fit_curves(exponential, exponential_jacobian, x, y, [1.0, 0.0], max_iter=2)
+    assert not result.converged.any()
+    assert np.isfinite(result.coeffs).all()
@@ -0,0 +1,49 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+import lesson_2
+from frame_cache import FrameCache
+
+
+def frame(n_rows: int) -> pd.DataFrame:
+    return pd.DataFrame({"Adj Close": np.arange(n_rows, dtype=np.float64)})
+
+
+def test_least_recently_used_are_evicted():
+    nbytes = int(frame(100).memory_usage(index=True).sum())
+    cache = FrameCache(max_bytes=2 * nbytes)
+    cache.put("a", frame(100))
+    cache.put("b", frame(100))
+    assert cache.get("a") is not None  # "b" is the least recently used now
+    cache.put("c", frame(100))
+    assert "b" not in cache
+    assert "a" in cache and "c" in cache
+    info = cache.info()
+    assert (info.hits, info.misses, info.evictions, info.entries) == (1, 0, 1, 2)
+    assert info.nbytes == 2 * nbytes
+
+
+def test_frames_larger_than_the_cache_are_not_cached():
+    cache = FrameCache(max_bytes=100)
+    cache.put("a", frame(1_000))
+    assert cache.get("a") is None
+    assert cache.info().entries == 0
+
+
+def test_updated_file_is_read_again(data_dir):
+    before = lesson_2.read_symbol("SPY")
+    assert lesson_2.read_symbol("SPY") is before
+
+    path = data_dir / "SPY.csv"
+    df = pd.read_csv(path)
+    df["Adj Close"] += 1
+    df.to_csv(path, index=False)
+    mtime = os.stat(path).st_mtime
+    os.utime(path, (mtime + 10, mtime + 10))
+
+    after = lesson_2.read_symbol("SPY")
+    np.testing.assert_allclose(after["Adj Close"], before["Adj Close"] + 1)
+    info = lesson_2.cache_info()
+    assert (info.hits, info.misses, info.entries) == (1, 2, 2)
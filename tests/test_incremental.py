@@ -0,0 +1,103 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from incremental import IncrementalAnalytics
+from lesson_2 import normalize_prices
+from lesson_4 import (
+    compute_cumulative_returns,
+    compute_daily_returns,
+    get_rolling_mean,
+    get_rolling_std,
+)
+
+
+@pytest.fixture
+def gapped(prices) -> pd.DataFrame:
+    """The prices of a symbol listed later and of a symbol with a gap."""
+    gapped = prices.copy()
+    gapped.iloc[:30, 2] = np.nan
+    gapped.iloc[100:105, 1] = np.nan
+    return gapped
+
+
+def assert_matches(
+    analytics: IncrementalAnalytics, prices: pd.DataFrame, allocations
+) -> None:
+    def check(actual, expected):
+        pd.testing.assert_frame_equal(
+            actual, expected, check_freq=False, check_names=False, atol=1e-8
+        )
+
+    check(analytics.prices, prices)
+    check(analytics.normalized, normalize_prices(prices))
+    check(analytics.daily_returns, compute_daily_returns(prices))
+    check(analytics.cumulative_returns, compute_cumulative_returns(prices))
+    for window in analytics.windows:
+        check(analytics.rolling_mean(window), get_rolling_mean(prices, window))
+        check(analytics.rolling_std(window), get_rolling_std(prices, window))
+    expected = (normalize_prices(prices) * allocations).sum(axis=1)
+    pd.testing.assert_series_equal(
+        analytics.portfolio_value, expected, check_freq=False, atol=1e-8
+    )
+
+
+def test_daily_updates_match_full_recomputation(gapped, allocations):
+    analytics = IncrementalAnalytics(gapped.iloc[:50], [5, 20], allocations)
+    for day in range(50, len(gapped)):
+        assert analytics.update(gapped.iloc[: day + 1]) == []
+    assert analytics.high_water_mark == gapped.index[-1]
+    assert_matches(analytics, gapped, allocations)
+
+
+def test_recent_bars_only(gapped, allocations):
+    analytics = IncrementalAnalytics(gapped.iloc[:200], [20], allocations)
+    analytics.update(gapped.iloc[199:250])
+    analytics.update(gapped.iloc[249:])
+    assert_matches(analytics, gapped, allocations)
+
+
+def test_empty_initial_prices(gapped, allocations):
+    analytics = IncrementalAnalytics(gapped.iloc[:0], [20], allocations)
+    assert analytics.high_water_mark is None
+    assert analytics.update(gapped) == []
+    assert_matches(analytics, gapped, allocations)
+
+
+def test_missing_known_dates_raise(gapped):
+    analytics = IncrementalAnalytics(gapped.iloc[:20])
+    with pytest.raises(ValueError):
+        analytics.update(gapped.iloc[25:])
+    assert analytics.high_water_mark == gapped.index[19]
+
+
+def test_back_adjustment_with_full_history(gapped, allocations):
+    analytics = IncrementalAnalytics(gapped.iloc[:200], [20], allocations)
+    adjusted = gapped.copy()
+    adjusted["AAA"] /= 2
+    assert analytics.update(adjusted) == ["AAA"]
+    assert_matches(analytics, adjusted, allocations)
+
+
+def test_back_adjustment_with_recent_bars_only(gapped, allocations):
+    analytics = IncrementalAnalytics(gapped.iloc[:200], [20], allocations)
+    adjusted = gapped.copy()
+    adjusted["AAA"] /= 2
+    assert analytics.update(adjusted.iloc[199:205]) == ["AAA"]
+    analytics.update(adjusted.iloc[204:])
+    assert_matches(analytics, adjusted, allocations)
+
+
+def test_back_adjustment_without_overlapping_price(gapped, allocations):
+    analytics = IncrementalAnalytics(gapped.iloc[:200], [20], allocations)
+    adjusted = gapped.copy()
+    adjusted["AAA"] /= 2
+    adjusted.iloc[199, 1] = np.nan
+    with pytest.raises(ValueError):
+        analytics.update(adjusted.iloc[199:205])
+
+
+def test_symbols_must_match(gapped, allocations):
+    analytics = IncrementalAnalytics(gapped.iloc[:200])
+    with pytest.raises(ValueError):
+        analytics.update(gapped[["SPY", "AAA"]])
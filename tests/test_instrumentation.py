@@ -0,0 +1,91 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import instrumentation
+from instrumentation import count, instrument, profiling, propagate
+
+
+@instrument
+def inner(n: int) -> int:
+    count("items", n)
+    return n
+
+
+@instrument
+def outer(n: int) -> int:
+    count("items")
+    return inner(n) + inner(n)
+
+
+def test_disabled_records_nothing():
+    assert outer(2) == 4
+    assert instrumentation._profile is None
+
+
+def test_calls_and_counters():
+    with profiling() as profile:
+        outer(3)
+    assert outer(3) == 6  # Not recorded after the block
+    assert [record.stack for record in profile.records] == [
+        ("outer", "inner"),
+        ("outer", "inner"),
+        ("outer",),
+    ]
+    assert [dict(record.counters) for record in profile.records] == [
+        {"items": 3},
+        {"items": 3},
+        {"items": 1},
+    ]
+    summary = profile.summary().splitlines()
+    assert summary[0].split() == [
+        "function",
+        "calls",
+        "seconds",
+        "max_seconds",
+        "items",
+    ]
+    assert {line.split()[0]: line.split()[1] for line in summary[1:]} == {
+        "outer": "1",
+        "inner": "2",
+    }
+
+
+def test_folded_output(tmp_path):
+    with profiling() as profile:
+        outer(1)
+    path = tmp_path / "profile.folded"
+    profile.write_folded(str(path))
+    stacks = [line.rsplit(" ", 1) for line in path.read_text().splitlines()]
+    assert sorted(stack for stack, _ in stacks) == ["outer", "outer;inner"]
+    assert all(int(microseconds) >= 0 for _, microseconds in stacks)
+
+
+def test_threads_have_their_own_calls():
+    started = threading.Barrier(2)
+
+    @instrument
+    def waiting():
+        # Both threads are in their call at once.
+        started.wait()
+        count("items")
+
+    with profiling() as profile:
+        threads = [threading.Thread(target=waiting) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    assert [record.stack for record in profile.records] == [("waiting",)] * 2
+    assert [dict(record.counters) for record in profile.records] == [{"items": 1}] * 2
+
+
+def test_pool_calls_are_nested_in_the_caller():
+    @instrument
+    def pooled(n: int) -> int:
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            return sum(executor.map(propagate(inner), range(n)))
+
+    with profiling() as profile:
+        pooled(4)
+    stacks = sorted(record.stack for record in profile.records)
+    assert stacks == [("pooled",)] + [("pooled", "inner")] * 4
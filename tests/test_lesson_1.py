@@ -0,0 +1,21 @@
+import pandas as pd
+
+from lesson_1 import get_mean_volume, read_field
+from price_store import build_store
+
+
+def test_read_field_is_the_same_with_and_without_the_store(data_dir):
+    from_csv = read_field("AAA", "Volume")
+    build_store(data_dir, data_dir / "store")
+    from_store = read_field("AAA", "Volume")
+
+    pd.testing.assert_series_equal(from_csv, from_store, check_freq=False)
+    assert from_csv.index.is_monotonic_increasing
+    assert from_csv.index.name == "Date"
+    assert from_csv.name == "Volume"
+    assert len(from_csv) == 450
+
+
+def test_get_mean_volume(data_dir):
+    volume = pd.read_csv(data_dir / "BBB.csv")["Volume"]
+    assert get_mean_volume("BBB") == volume.mean()
@@ -0,0 +1,56 @@
+import pandas as pd
+
+import csv_index
+import lesson_2
+
+
+def test_short_range_reads_are_cached(data_dir):
+    for _ in range(3):
+        df = lesson_2.read_symbol("SPY", start_date="2010-02-01", end_date="2010-02-26")
+    assert len(df) == 20
+    info = lesson_2.cache_info()
+    assert (info.hits, info.misses, info.entries) == (2, 1, 1)
+
+
+def test_cached_range_serves_the_ranges_it_contains(data_dir):
+    lesson_2.read_symbol("SPY", start_date="2010-02-01", end_date="2010-03-31")
+    for start_date, end_date in [
+        ("2010-02-08", "2010-02-19"),
+        ("2010-03-01", "2010-03-31"),
+    ]:
+        df = lesson_2.read_symbol("SPY", start_date=start_date, end_date=end_date)
+        expected = csv_index.read_csv_range(data_dir / "SPY.csv", start_date, end_date)
+        pd.testing.assert_frame_equal(df, expected)
+    info = lesson_2.cache_info()
+    assert (info.hits, info.misses, info.entries) == (2, 1, 1)
+
+    # Overlapping only, the range is read.
+    lesson_2.read_symbol("SPY", start_date="2010-03-15", end_date="2010-04-15")
+    assert lesson_2.cache_info().entries == 2
+
+
+def test_cached_file_serves_ranges(data_dir):
+    whole = lesson_2.read_symbol("SPY")
+    df = lesson_2.read_symbol("SPY", start_date="2010-02-01", end_date="2010-02-26")
+    assert df is whole
+    assert lesson_2.cache_info().entries == 1
+
+
+def test_corrupt_index_is_rebuilt(data_dir):
+    path = data_dir / "SPY.csv"
+    csv_index.build_index(path)
+    index_file = csv_index.index_path(path)
+    index_file.write_bytes(b"PK\x03\x04 partly written")
+    csv_index._load_index.cache_clear()
+    index = csv_index.load_index(path)
+    assert len(index.dates) == 500
+    assert list(index_file.parent.glob(".*")) == []
+
+
+def test_workers_do_not_change_the_prices(data_dir):
+    symbols = ["AAA", "BBB", "SPY"]
+    in_process = lesson_2.get_stock_prices(symbols, "2010-01-01", "2011-12-31", 1)
+    lesson_2.clear_cache()
+    pooled = lesson_2.get_stock_prices(symbols, "2010-01-01", "2011-12-31", 3)
+    pd.testing.assert_frame_equal(pooled, in_process)
+    assert list(pooled.columns) == ["SPY", "AAA", "BBB"]
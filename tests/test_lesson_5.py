@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from lesson_5 import FILL_CHUNK_COLUMNS, fill_missing_values
+
+
+@pytest.fixture
+def prices() -> pd.DataFrame:
+    """Prices of more symbols than a chunk, with leading, inner and trailing gaps."""
+    rng = np.random.default_rng(0)
+    values = rng.uniform(10, 100, (300, 2 * FILL_CHUNK_COLUMNS + 5))
+    values[rng.random(values.shape) < 0.1] = np.nan
+    for column in range(values.shape[1]):
+        start, length = rng.integers(0, 300, 2)
+        values[start : start + length // 4, column] = np.nan
+    values[:40, 0] = np.nan  # Listed later
+    values[-60:, 1] = np.nan  # Delisted
+    values[:, 2] = np.nan  # Never traded
+    dates = pd.bdate_range("2010-01-04", periods=len(values))
+    return pd.DataFrame(values, index=dates)
+
+
+@pytest.mark.parametrize("limit", [None, 1, 5])
+def test_matches_pandas_fill(prices, limit):
+    expected = prices.ffill(limit=limit).bfill(limit=limit)
+    df = prices.copy()
+    filled = fill_missing_values(df, limit)
+    pd.testing.assert_frame_equal(df, expected)
+    pd.testing.assert_series_equal(
+        filled, prices.isna().sum() - expected.isna().sum(), check_dtype=False
+    )
+
+
+def test_fills_in_place(prices):
+    df = prices.copy()
+    values = df.to_numpy(copy=False)
+    fill_missing_values(df)
+    assert np.shares_memory(values, df.to_numpy(copy=False))
+    assert not np.isnan(values[:, :2]).any()
+
+
+def test_fills_mixed_dtypes():
+    df = pd.DataFrame({"A": [1.0, np.nan, 3.0], "B": [np.nan, 2.0, np.nan], "C": 1})
+    expected = df.ffill().bfill()
+    filled = fill_missing_values(df)
+    pd.testing.assert_frame_equal(df, expected, check_dtype=False)
+    assert filled.tolist() == [1, 2, 0]
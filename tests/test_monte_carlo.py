@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+from monte_carlo import simulate_portfolio
+
+
+@pytest.fixture
+def daily_returns() -> np.ndarray:
+    rng = np.random.default_rng(0)
+    return 0.0005 + 0.01 * rng.standard_normal((250, 3))
+
+
+def test_results_do_not_depend_on_the_number_of_workers(daily_returns, allocations):
+    options = dict(n_paths=250, n_days=60, block_size=5, seed=42, batch_size=50)
+    in_process = simulate_portfolio(
+        daily_returns, allocations, max_workers=1, **options
+    )
+    pooled = simulate_portfolio(daily_returns, allocations, max_workers=3, **options)
+    for actual, expected in zip(pooled, in_process):
+        np.testing.assert_array_equal(actual, expected)
+    assert len(in_process.cumulative_return) == 250
+
+
+def test_resampling_every_day_in_order_is_buy_and_hold(daily_returns, allocations):
+    # A single block of all the days is the historical path itself.
+    results = simulate_portfolio(
+        daily_returns, allocations, n_paths=3, block_size=len(daily_returns), seed=0
+    )
+    growth = np.prod(1 + daily_returns, axis=0)
+    np.testing.assert_allclose(results.cumulative_return, growth @ allocations - 1)
+
+
+@pytest.mark.parametrize(
+    "options",
+    [dict(n_paths=0), dict(n_days=1), dict(batch_size=0), dict(block_size=0)],
+)
+def test_invalid_arguments(daily_returns, allocations, options):
+    with pytest.raises(ValueError):
+        simulate_portfolio(daily_returns, allocations, **options)
@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+
+from parameter_search import grid, iter_search, random_grid, search
+
+
+def mean_above(prices: np.ndarray, level: float, column: int) -> dict:
+    """A toy objective, higher for lower levels."""
+    return {"score": float(np.mean(prices[:, column] - level))}
+
+
+def test_grid():
+    assert grid(a=[1, 2], b=["x", "y"]) == [
+        {"a": 1, "b": "x"},
+        {"a": 1, "b": "y"},
+        {"a": 2, "b": "x"},
+        {"a": 2, "b": "y"},
+    ]
+
+
+def test_random_grid():
+    candidates = random_grid(5, seed=0, a=range(10), b=[0.5, 1.5])
+    assert len(candidates) == 5
+    assert len({(params["a"], params["b"]) for params in candidates}) == 5
+    assert all(params in grid(a=range(10), b=[0.5, 1.5]) for params in candidates)
+    assert candidates == random_grid(5, seed=0, a=range(10), b=[0.5, 1.5])
+    # At most every combination.
+    assert len(random_grid(100, a=[1, 2], b=[3])) == 2
+
+
+def test_workers_give_the_same_ranking(prices):
+    candidates = grid(level=[90.0, 100.0, 110.0], column=[0, 1, 2])
+    in_process = search(mean_above, prices, candidates, "score", max_workers=1)
+    pooled = search(mean_above, prices, candidates, "score", max_workers=2)
+    pd.testing.assert_frame_equal(pooled, in_process)
+    assert in_process["score"].is_monotonic_decreasing
+
+
+def test_resume_from_results(prices, tmp_path):
+    results_path = tmp_path / "results.jsonl"
+    candidates = grid(level=[90.0, 100.0, 110.0], column=[0, 1])
+    first = list(
+        iter_search(mean_above, prices, candidates[:4], "score", results_path, None, 1)
+    )
+    assert len(first) == 4
+    rest = list(
+        iter_search(mean_above, prices, candidates, "score", results_path, None, 1)
+    )
+    assert [params for params, _ in rest] == candidates[4:]
+
+    table = search(mean_above, prices, candidates, "score", results_path, None, 1)
+    assert len(table) == len(candidates)
+    assert len(results_path.read_text().splitlines()) == len(candidates)
+
+
+def test_patience_stops_early(prices):
+    # Every candidate is worse than the first one.
+    candidates = grid(level=[80.0, 90.0, 100.0, 110.0, 120.0], column=[0])
+    results = list(
+        iter_search(mean_above, prices, candidates, "score", patience=2, max_workers=1)
+    )
+    assert [params["level"] for params, _ in results] == [80.0, 90.0, 100.0]
@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+from lesson_2 import get_stock_prices
+from lesson_7 import (
+    compute_portfolio_average_daily_return,
+    compute_portfolio_cumulative_return,
+    compute_portfolio_daily_returns,
+    compute_portfolio_risk,
+    compute_portfolio_value,
+    compute_sharpe_ratio,
+)
+from portfolio_batch import evaluate_portfolios
+
+from .conftest import SYMBOLS
+
+
+# AAA starts trading in the range, and BBB has a gap: their missing prices
+# add nothing to the value.
+@pytest.mark.parametrize(
+    "start_date, end_date", [("2010-04-01", "2010-12-31"), ("2010-01-01", "2011-06-30")]
+)
+def test_matches_lesson_7(data_dir, start_date, end_date):
+    allocations = np.array([[0.5, 0.3, 0.2], [1.0, 0.0, 0.0], [0.2, 0.2, 0.6]])
+    prices = get_stock_prices(SYMBOLS, start_date, end_date)
+    stats = evaluate_portfolios(prices, allocations, budget=1_000_000)
+
+    for k, row in enumerate(allocations):
+        value = compute_portfolio_value(
+            1_000_000, SYMBOLS, list(row), start_date, end_date
+        )
+        daily_returns = compute_portfolio_daily_returns(value)
+        np.testing.assert_allclose(stats.values[k], value)
+        assert stats.cumulative_return[k] == pytest.approx(
+            compute_portfolio_cumulative_return(value)
+        )
+        assert stats.average_daily_return[k] == pytest.approx(
+            compute_portfolio_average_daily_return(daily_returns)
+        )
+        assert stats.risk[k] == pytest.approx(compute_portfolio_risk(daily_returns))
+        assert stats.sharpe_ratio[k] == pytest.approx(
+            compute_sharpe_ratio(daily_returns)
+        )
@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+import pytest
+import scipy.optimize as spo
+
+from lesson_7 import compute_sharpe_ratio
+from portfolio_optimizer import (
+    RISK_FREE_RATE,
+    compute_return_moments,
+    optimize_allocations,
+    optimize_rolling,
+    sharpe_ratio,
+)
+
+
+def daily_returns(means=(0.0005, 0.001, -0.0002, 0.0008)) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    return pd.DataFrame(np.array(means) + 0.01 * rng.standard_normal((500, 4)))
+
+
+def search_allocations(moments, risk_free_rate: float) -> np.ndarray:
+    """Maximizes the Sharpe ratio with a general solver (SLSQP)."""
+    n = len(moments.mean)
+    result = spo.minimize(
+        lambda allocations: -sharpe_ratio(allocations, moments, risk_free_rate),
+        np.full(n, 1 / n),
+        method="SLSQP",
+        bounds=[(0, 1)] * n,
+        constraints={"type": "eq", "fun": lambda allocations: allocations.sum() - 1},
+        options={"ftol": 1e-12},
+    )
+    return result.x
+
+
+def test_sharpe_ratio_matches_lesson_7():
+    returns = daily_returns()
+    allocations = np.array([0.4, 0.3, 0.2, 0.1])
+    moments = compute_return_moments(returns)
+    rebalanced = returns @ allocations
+    for rate in [0.0, RISK_FREE_RATE, 0.01]:
+        np.testing.assert_allclose(
+            sharpe_ratio(allocations, moments, rate),
+            compute_sharpe_ratio(rebalanced, rate),
+        )
+
+
+@pytest.mark.parametrize("risk_free_rate", [None, 0.0, 0.0006])
+def test_exact_solution_maximizes_the_sharpe_ratio(risk_free_rate):
+    moments = compute_return_moments(daily_returns())
+    if risk_free_rate is None:
+        # The default rate.
+        exact = optimize_allocations(moments)
+        risk_free_rate = RISK_FREE_RATE
+    else:
+        exact = optimize_allocations(moments, risk_free_rate=risk_free_rate)
+    searched = search_allocations(moments, risk_free_rate)
+    assert np.isclose(exact.sum(), 1)
+    assert (exact >= 0).all()
+    assert sharpe_ratio(exact, moments, risk_free_rate) >= (
+        sharpe_ratio(searched, moments, risk_free_rate) - 1e-9
+    )
+    np.testing.assert_allclose(exact, searched, atol=1e-3)
+
+    # A warm start over the same support gives the same allocations.
+    np.testing.assert_allclose(
+        optimize_allocations(moments, exact, risk_free_rate=risk_free_rate), exact
+    )
+
+
+def test_no_symbol_beats_the_risk_free_rate():
+    moments = compute_return_moments(daily_returns())
+    with pytest.raises(ValueError):
+        optimize_allocations(moments, risk_free_rate=0.01)
+
+    allocations = optimize_rolling(daily_returns(), window=100, step=100)
+    optimized = allocations.notna().all(axis=1)
+    assert optimized.sum() >= 3
+    assert np.allclose(allocations[optimized].sum(axis=1), 1)
+    assert allocations[~optimized].isna().all().all()
+    losing = optimize_rolling(daily_returns((-0.01,) * 4), window=100, step=100)
+    assert losing.isna().all().all()
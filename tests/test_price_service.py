@@ -0,0 +1,79 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from price_service import PriceService
+from price_store import PriceStore, build_store
+
+
+@pytest.fixture
+def service(data_dir):
+    return PriceService(data_dir / "store", data_dir)
+
+
+def get(service: PriceService, target: str) -> tuple:
+    """Returns the status line and body of a GET request to the service."""
+
+    async def request():
+        server = await asyncio.start_server(service.handle, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(f"GET {target} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+            await writer.drain()
+            status = (await reader.readline()).decode().strip()
+            length = 0
+            while (line := await reader.readline()) not in (b"\r\n", b""):
+                name, _, value = line.decode().partition(":")
+                if name.lower() == "content-length":
+                    length = int(value)
+            body = await reader.readexactly(length)
+            writer.close()
+            return status, body
+
+    return asyncio.run(request())
+
+
+def test_query(service):
+    status, body = get(service, "/prices?symbols=AAA&start=2010-03-01&end=2010-03-31")
+    assert status == "HTTP/1.1 200 OK"
+    expected = service.store.get_stock_prices(["AAA"], "2010-03-01", "2010-03-31")
+    dates = np.frombuffer(body, dtype="<i8", count=len(expected))
+    values = np.frombuffer(body, dtype="<f8", offset=len(expected) * 8)
+    np.testing.assert_array_equal(dates, expected.index.asi8)
+    np.testing.assert_array_equal(values.reshape(expected.shape), expected.to_numpy())
+
+
+@pytest.mark.parametrize(
+    "target",
+    [
+        "/prices?symbols=AAA&start=garbage&end=2010-03-31",
+        "/prices?symbols=AAA&start=2010-03-01",
+        "/prices?symbols=AAA&start=2010-03-01&end=2010-13-45",
+    ],
+)
+def test_bad_request(service, target):
+    status, body = get(service, target)
+    assert status == "HTTP/1.1 400 Bad Request"
+
+
+def test_unknown_symbol(service):
+    status, body = get(service, "/prices?symbols=ZZZ&start=2010-03-01&end=2010-03-31")
+    assert status == "HTTP/1.1 404 Not Found"
+    assert b"ZZZ" in body
+
+
+def test_failed_query(service, monkeypatch):
+    def fail(*args):
+        raise RuntimeError("disk error")
+
+    monkeypatch.setattr(service, "query", fail)
+    status, body = get(service, "/prices?symbols=AAA&start=2010-03-01&end=2010-03-31")
+    assert status == "HTTP/1.1 500 Internal Server Error"
+
+
+def test_store_membership(data_dir):
+    store = PriceStore(build_store(data_dir, data_dir / "store"))
+    assert "AAA" in store
+    assert "ZZZ" not in store
@@ -0,0 +1,35 @@
+import os
+
+import pandas as pd
+
+import lesson_2
+from price_store import build_store, open_store
+
+from .conftest import SYMBOLS
+
+
+def test_store_matches_csv_files(data_dir):
+    from_csv = lesson_2.get_stock_prices(SYMBOLS, "2010-02-01", "2011-06-30")
+    build_store()
+    assert open_store().is_fresh(SYMBOLS)
+    cache_info = lesson_2.cache_info()
+    from_store = lesson_2.get_stock_prices(SYMBOLS, "2010-02-01", "2011-06-30")
+    assert lesson_2.cache_info() == cache_info  # No CSV file was read
+    pd.testing.assert_frame_equal(from_store, from_csv)
+    # Missing prices (AAA before it traded, BBB's gap) are NaN in both.
+    assert from_store.isna().any().tolist() == [False, True, True]
+
+
+def test_newer_csv_falls_back_to_the_csv_files(data_dir):
+    build_store()
+    path = data_dir / "AAA.csv"
+    df = pd.read_csv(path)
+    df["Adj Close"] *= 2
+    df.to_csv(path, index=False)
+    meta_mtime = os.stat(data_dir / "store" / "meta.json").st_mtime
+    os.utime(path, (meta_mtime + 10, meta_mtime + 10))
+
+    assert not open_store().is_fresh(SYMBOLS)
+    prices = lesson_2.get_stock_prices(SYMBOLS, "2010-06-01", "2010-06-30")
+    expected = df.set_index(pd.to_datetime(df["Date"]))["Adj Close"]
+    assert (prices["AAA"] == expected.reindex(prices.index)).all()
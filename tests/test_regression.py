@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+
+from regression import compute_regression_stats
+
+
+def daily_returns(missing: bool) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    spy = 0.01 * rng.standard_normal(250)
+    returns = pd.DataFrame(
+        {
+            "SPY": spy,
+            "A": 1.5 * spy + 0.005 * rng.standard_normal(250),
+            "B": -0.5 * spy + 0.01 * rng.standard_normal(250),
+        }
+    )
+    if missing:
+        returns.iloc[:20, 1] = np.nan
+        returns.iloc[100:105, 2] = np.nan
+    return returns
+
+
+def test_matches_polyfit_and_corr():
+    for missing in [False, True]:
+        returns = daily_returns(missing)
+        stats = compute_regression_stats(returns, benchmark="SPY")
+        correlations = returns.corr()["SPY"]
+        for symbol in returns.columns:
+            present = returns["SPY"].notna() & returns[symbol].notna()
+            x, y = returns["SPY"][present], returns[symbol][present]
+            beta, alpha = np.polyfit(x, y, 1)
+            residuals = y - (beta * x + alpha)
+            row = stats.loc[symbol]
+            np.testing.assert_allclose(
+                [row.beta, row.alpha, row.correlation, row.residual_std],
+                [
+                    beta,
+                    alpha,
+                    correlations[symbol],
+                    np.sqrt((residuals**2).sum() / (present.sum() - 2)),
+                ],
+                rtol=1e-9,
+                atol=1e-12,
+            )
+            assert row.r_squared == row.correlation**2
@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from rolling_regression import (
+    compute_rolling_regression,
+    iter_rolling_correlation_matrices,
+)
+
+
+@pytest.fixture
+def daily_returns() -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    spy = 0.01 * rng.standard_normal(300)
+    returns = pd.DataFrame(
+        {
+            "SPY": spy,
+            "A": 1.2 * spy + 0.005 * rng.standard_normal(300),
+            "B": 0.01 * rng.standard_normal(300),
+            "C": -spy + 0.002 * rng.standard_normal(300),
+        }
+    )
+    returns.iloc[50:55, 1] = np.nan
+    returns.iloc[100:180, 2] = 0.0  # Not traded
+    return returns
+
+
+def test_rolling_regression_matches_pandas(daily_returns):
+    window = 30
+    regression = compute_rolling_regression(daily_returns, "SPY", window)
+    rolling = daily_returns.rolling(window)
+    spy = daily_returns["SPY"]
+    beta = rolling.cov(spy).div(spy.rolling(window).var(), axis=0)
+    alpha = rolling.mean().sub(beta.mul(spy.rolling(window).mean(), axis=0))
+    correlation = rolling.corr(spy)
+
+    options = dict(rtol=1e-7, atol=1e-9)
+    np.testing.assert_allclose(regression.beta, beta, **options)
+    np.testing.assert_allclose(regression.alpha, alpha, **options)
+    np.testing.assert_allclose(regression.correlation, correlation, **options)
+    assert regression.correlation["B"].iloc[170:180].isna().all()
+
+
+def test_rolling_correlation_matrices_match_pandas(daily_returns):
+    window = 30
+    filled = daily_returns.fillna(0)
+    chunks = list(
+        iter_rolling_correlation_matrices(daily_returns, window, max_bytes=50 * 128)
+    )
+    assert len(chunks) > 1
+    dates = np.concatenate([chunk_dates for chunk_dates, _ in chunks])
+    matrices = np.concatenate([chunk for _, chunk in chunks])
+    assert list(dates) == list(daily_returns.index[window - 1 :])
+    for day in [window - 1, 100, 150, len(filled) - 1]:
+        expected = filled.iloc[day - window + 1 : day + 1].corr().to_numpy()
+        np.testing.assert_allclose(
+            matrices[day - window + 1], expected, rtol=1e-7, atol=1e-9
+        )
@@ -0,0 +1,32 @@
+import numpy as np
+
+from lesson_4 import get_rolling_mean, get_rolling_std
+from rolling_windows import iter_rolling_mean_std, rolling_mean_std
+
+
+def test_matches_pandas_rolling(prices):
+    prices = prices.copy()
+    prices.iloc[:30, 1] = np.nan  # Listed later
+    prices.iloc[150:155, 2] = np.nan  # A gap
+    windows = [1, 5, 20, 60]
+    stats = rolling_mean_std(prices, windows)
+    assert stats.mean.shape == (len(windows),) + prices.shape
+
+    for i, window in enumerate(windows):
+        rm = get_rolling_mean(prices, window).to_numpy()
+        rstd = get_rolling_std(prices, window).to_numpy()
+        # NaN in the same places: the first window - 1 rows and the windows
+        # holding a missing price.
+        np.testing.assert_array_equal(np.isnan(stats.mean[i]), np.isnan(rm))
+        np.testing.assert_array_equal(np.isnan(stats.std[i]), np.isnan(rstd))
+        np.testing.assert_allclose(stats.mean[i], rm, rtol=1e-9)
+        np.testing.assert_allclose(stats.std[i], rstd, rtol=1e-6, atol=1e-9)
+
+
+def test_windows_are_yielded_in_order(prices):
+    windows = [20, 5]
+    stats = rolling_mean_std(prices, windows)
+    for i, (window, mean, std) in enumerate(iter_rolling_mean_std(prices, windows)):
+        assert window == windows[i]
+        np.testing.assert_array_equal(mean, stats.mean[i])
+        np.testing.assert_array_equal(std, stats.std[i])
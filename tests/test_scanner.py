@@ -0,0 +1,53 @@
+import pandas as pd
+import pytest
+
+from scanner import (
+    Aggregation,
+    FirstDate,
+    LastDate,
+    Max,
+    Mean,
+    Min,
+    RowCount,
+    read_tail,
+    scan,
+)
+
+
+def test_scan_matches_pandas(data_dir):
+    aggregations = {
+        "mean_volume": lambda: Mean("Volume"),
+        "max_high": lambda: Max("High"),
+        "min_low": lambda: Min("Low"),
+        "rows": RowCount,
+        "first_date": FirstDate,
+        "last_date": LastDate,
+    }
+    results = dict(scan(aggregations, chunksize=64, max_workers=2, data_dir=data_dir))
+    assert sorted(results) == ["AAA", "BBB", "SPY"]
+    for symbol, result in results.items():
+        df = pd.read_csv(data_dir / f"{symbol}.csv", parse_dates=["Date"])
+        assert result["mean_volume"] == pytest.approx(df["Volume"].mean())
+        assert result["max_high"] == df["High"].max()
+        assert result["min_low"] == df["Low"].min()
+        assert result["rows"] == len(df)
+        assert result["first_date"] == df["Date"].min()
+        assert result["last_date"] == df["Date"].max()
+
+
+def test_read_tail(data_dir):
+    df = pd.read_csv(data_dir / "SPY.csv")
+    assert len(read_tail(data_dir / "SPY.csv", 0)) == 0
+    for n in [1, 5, 200, len(df) + 10]:
+        pd.testing.assert_frame_equal(
+            read_tail(data_dir / "SPY.csv", n), df.tail(n).reset_index(drop=True)
+        )
+
+
+def test_incomplete_aggregation_fails_when_created():
+    class Total(Aggregation):
+        def update(self, chunk: pd.DataFrame) -> None:
+            pass
+
+    with pytest.raises(TypeError):
+        Total()
@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from lesson_4 import get_bollinger_bands, get_rolling_mean, get_rolling_std
+from streaming_indicators import RollingBands
+
+
+@pytest.fixture
+def gapped(prices) -> pd.DataFrame:
+    gapped = prices.copy()
+    gapped.iloc[:30, 1] = np.nan  # Listed later
+    gapped.iloc[200:203, 2] = np.nan  # A gap
+    gapped.iloc[100:150, 2] = 42.0  # Not traded, the price does not change
+    return gapped
+
+
+@pytest.mark.parametrize("window", [1, 5, 20])
+def test_matches_pandas(gapped, window):
+    bands = RollingBands(list(gapped.columns), window, num_std=2.5)
+    streamed = bands.update_batch(gapped.to_numpy())
+
+    rm = get_rolling_mean(gapped, window)
+    rstd = get_rolling_std(gapped, window)
+    upper_band, lower_band = get_bollinger_bands(rm, rstd, num_std=2.5)
+    for actual, expected in [
+        (streamed.mean, rm),
+        (streamed.std, rstd),
+        (streamed.upper, upper_band),
+        (streamed.lower, lower_band),
+    ]:
+        np.testing.assert_allclose(actual, expected.to_numpy(), rtol=1e-9, atol=1e-9)
+
+
+def test_constant_prices_have_zero_std(gapped):
+    bands = RollingBands(list(gapped.columns), 20)
+    streamed = bands.update_batch(gapped.to_numpy())
+    assert (streamed.std[120:150, 2] == 0).all()
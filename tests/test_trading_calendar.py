@@ -0,0 +1,51 @@
+import pandas as pd
+import pytest
+
+from trading_calendar import (
+    first_trading_day,
+    get_trading_days,
+    get_trading_days_between,
+    last_trading_day,
+    trading_day_positions,
+)
+
+from .conftest import N_DAYS
+
+
+def test_trading_days_are_spy_dates_ascending(data_dir):
+    days = get_trading_days()
+    expected = pd.bdate_range("2010-01-04", periods=N_DAYS)
+    pd.testing.assert_index_equal(days, expected, check_names=False, exact=False)
+
+
+def test_first_and_last_trading_days(data_dir):
+    # 2010-01-09 and 2010-01-10 are a weekend.
+    assert first_trading_day("2010-01-09") == pd.Timestamp("2010-01-11")
+    assert last_trading_day("2010-01-10") == pd.Timestamp("2010-01-08")
+    assert first_trading_day("2010-01-11") == pd.Timestamp("2010-01-11")
+    assert last_trading_day("2010-01-11") == pd.Timestamp("2010-01-11")
+
+    days = get_trading_days()
+    assert first_trading_day("2000-01-01") == days[0]
+    assert first_trading_day("2030-01-01") is None
+    assert last_trading_day("2030-01-01") == days[-1]
+    assert last_trading_day("2000-01-01") is None
+
+
+@pytest.mark.parametrize(
+    "start_date, end_date, expected",
+    [
+        ("2010-01-04", "2010-01-08", slice(0, 5)),
+        ("2010-01-09", "2010-01-10", slice(5, 5)),  # A weekend
+        ("2000-01-01", "2010-01-05", slice(0, 2)),
+        ("2000-01-01", "2030-01-01", slice(0, N_DAYS)),
+        ("2030-01-01", "2031-01-01", slice(N_DAYS, N_DAYS)),
+    ],
+)
+def test_trading_day_positions(data_dir, start_date, end_date, expected):
+    assert trading_day_positions(start_date, end_date) == expected
+    days = get_trading_days_between(start_date, end_date)
+    assert len(days) == expected.stop - expected.start
+    if len(days):
+        assert days[0] == first_trading_day(start_date)
+        assert days[-1] == last_trading_day(end_date)